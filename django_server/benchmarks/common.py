@@ -0,0 +1,48 @@
+"""
+Shared setup of the benchmark scripts, run them from the django_server directory, e.g.
+    python benchmarks/measurement_buffer.py
+Django is configured with the regular settings but a fresh sqlite database in a temporary directory,
+so the benchmarks never touch db.sqlite3 and the measured numbers include the configured PRAGMAs.
+"""
+import os
+import shutil
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def setup_django() -> str:
+    """
+    :return: temporary directory holding the benchmark database, removed again on exit
+    """
+    sys.path.insert(0, BASE_DIR)
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'django_server.settings')
+
+    import atexit
+    import django
+    from django.core.management import call_command
+    from django_server import settings
+
+    directory = tempfile.mkdtemp(prefix='fpf_benchmark_')
+    atexit.register(shutil.rmtree, directory, ignore_errors=True)
+    settings.DATABASES['default']['NAME'] = os.path.join(directory, 'db.sqlite3')
+
+    django.setup()
+    call_command('migrate', verbosity=0)
+    return directory
+
+
+@contextmanager
+def timed(results: dict, name: str):
+    start = time.perf_counter()
+    yield
+    results[name] = time.perf_counter() - start
+
+
+def print_table(header: list[str], rows: list[list]):
+    widths = [max(len(str(cell)) for cell in column) for column in zip(header, *rows)]
+    for row in [header, *rows]:
+        print('  '.join(str(cell).rjust(width) for cell, width in zip(row, widths)))
@@ -0,0 +1,80 @@
+"""
+Compares the orm and segment_log measurement buffer backends:
+storing measurements in batches, reading them in upload packages and acknowledging them.
+    python benchmarks/measurement_buffer.py [--measurements 100000] [--sensors 10] [--batch 100]
+"""
+import argparse
+import os
+import uuid
+from datetime import timedelta
+
+from common import print_table, setup_django, timed
+
+
+def run(buffer, sensor_ids: list[str], measurements: int, batch: int, package_size: int) -> dict:
+    from django.utils import timezone
+    from fpf_sensor_service.services.measurement_buffer_services import BufferedMeasurement
+
+    start = timezone.now()
+    results = {}
+    with timed(results, 'add'):
+        for offset in range(0, measurements, batch):
+            buffer.add_many([
+                BufferedMeasurement(sensor_id=sensor_ids[i % len(sensor_ids)], value=float(i),
+                                    measuredAt=start + timedelta(seconds=i))
+                for i in range(offset, min(offset + batch, measurements))
+            ])
+
+    read = 0
+    with timed(results, 'read'):
+        for sensor_id in buffer.sensor_ids():
+            for package in buffer.iter_packages(sensor_id, package_size):
+                read += len(package)
+    assert read == measurements, f'read {read} of {measurements} measurements'
+
+    with timed(results, 'read + ack'):
+        for sensor_id in buffer.sensor_ids():
+            for package in buffer.iter_packages(sensor_id, package_size):
+                buffer.acknowledge(package)
+    assert not buffer.sensor_ids()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--measurements', type=int, default=100_000)
+    parser.add_argument('--sensors', type=int, default=10)
+    parser.add_argument('--batch', type=int, default=100, help='measurements per add_many call')
+    args = parser.parse_args()
+
+    directory = setup_django()
+    from django_server import settings
+    from fpf_sensor_service.models import SensorConfig
+    from fpf_sensor_service.services.measurement_buffer_services import OrmMeasurementBuffer, \
+        SegmentLogMeasurementBuffer
+
+    sensor_ids = [str(uuid.uuid4()) for _ in range(args.sensors)]
+    SensorConfig.objects.bulk_create([
+        SensorConfig(id=sensor_id, intervalSeconds=1, sensorClassId=uuid.uuid4()) for sensor_id in sensor_ids
+    ])
+
+    backends = {
+        'orm': OrmMeasurementBuffer(),
+        'segment_log': SegmentLogMeasurementBuffer(
+            os.path.join(directory, 'segments'), settings.MEASUREMENT_BUFFER_SEGMENT_RECORDS
+        ),
+    }
+    rows = []
+    for name, buffer in backends.items():
+        results = run(buffer, sensor_ids, args.measurements, args.batch, settings.MEASUREMENT_PACKAGE_SIZE)
+        rows.append([name] + [
+            f'{seconds:.2f}s ({args.measurements / seconds:,.0f}/s)' for seconds in results.values()
+        ])
+
+    print(f'{args.measurements} measurements of {args.sensors} sensors, batches of {args.batch}, '
+          f'packages of {settings.MEASUREMENT_PACKAGE_SIZE}')
+    print_table(['backend', *results.keys()], rows)
+
+
+if __name__ == '__main__':
+    main()
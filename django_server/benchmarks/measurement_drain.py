@@ -0,0 +1,100 @@
+"""
+Drains a backlog of pending measurements of one sensor from the orm buffer, like send_measurements after a long
+dashboard outage but without the http requests. Before, the drain loaded the whole backlog with len() and read every
+package with an OFFSET query, both are measured on the same backlog for comparison.
+    python benchmarks/measurement_drain.py [--rows 1000000] [--package-size 50]
+"""
+import argparse
+import time
+import tracemalloc
+import uuid
+
+from common import print_table, setup_django
+
+
+def measure(function) -> float:
+    start = time.perf_counter()
+    function()
+    return time.perf_counter() - start
+
+
+def peak_memory(function) -> int:
+    """
+    :return: peak of the python memory allocated while running function, traced in a separate run
+    as tracing slows down the timed ones
+    """
+    tracemalloc.start()
+    function()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--package-size', type=int, default=None, help='defaults to MEASUREMENT_PACKAGE_SIZE')
+    args = parser.parse_args()
+
+    setup_django()
+    from django_server import settings
+    from fpf_sensor_service.models import SensorConfig, SensorMeasurement
+    from fpf_sensor_service.services.measurement_buffer_services import BufferedMeasurement, OrmMeasurementBuffer
+
+    package_size = args.package_size or settings.MEASUREMENT_PACKAGE_SIZE
+    sensor = SensorConfig.objects.create(id=uuid.uuid4(), intervalSeconds=1, sensorClassId=uuid.uuid4())
+    buffer = OrmMeasurementBuffer()
+
+    for offset in range(0, args.rows, 10_000):
+        buffer.add_many([
+            BufferedMeasurement(sensor_id=sensor.id, value=float(i))
+            for i in range(offset, min(offset + 10_000, args.rows))
+        ])
+
+    queryset = SensorMeasurement.objects.filter(sensor_id=sensor.id).order_by('measuredAt')
+    packages = args.rows // package_size
+    mib = 2 ** 20
+    rows = []
+
+    def load_backlog():
+        len(queryset.all())
+
+    rows.append(['len() of the backlog', f'{measure(load_backlog):.2f}s', f'{peak_memory(load_backlog) / mib:.1f} MiB'])
+
+    # the deepest OFFSETs are the last packages of a drain
+    last_packages = range(max(packages - 20, 0), packages)
+
+    def read_last_offset_packages():
+        for i in last_packages:
+            list(queryset[i * package_size:(i + 1) * package_size])
+
+    seconds = measure(read_last_offset_packages)
+    rows.append(['OFFSET package at the end', f'{seconds / len(last_packages) * 1000:.2f}ms', ''])
+
+    keyset_packages = buffer.iter_packages(sensor.id, package_size)
+    for _ in range(last_packages.start):
+        next(keyset_packages)
+    seconds = measure(lambda: list(keyset_packages))
+    rows.append(['keyset package at the end', f'{seconds / len(last_packages) * 1000:.2f}ms', ''])
+
+    def read_all_keyset_packages():
+        for _ in buffer.iter_packages(sensor.id, package_size):
+            pass
+
+    rows.append(['keyset read of all packages', f'{measure(read_all_keyset_packages):.2f}s',
+                 f'{peak_memory(read_all_keyset_packages) / mib:.1f} MiB'])
+
+    def drain():
+        for package in buffer.iter_packages(sensor.id, package_size):
+            buffer.acknowledge(package)
+
+    seconds = measure(drain)
+    assert not SensorMeasurement.objects.exists()
+    rows.append(['keyset drain with ack', f'{seconds:.2f}s ({args.rows / seconds:,.0f} rows/s)', ''])
+
+    print(f'{args.rows} pending measurements of one sensor, packages of {package_size}')
+    print_table(['', 'time', 'peak memory'], rows)
+
+
+if __name__ == '__main__':
+    main()
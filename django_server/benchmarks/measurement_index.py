@@ -0,0 +1,134 @@
+"""
+SQLite query plans and timings of the measurement buffer queries for different primary keys and indexes,
+each variant in a database file of its own with the SQLITE_* profile from the settings:
+    uuid4 + sensor index      before: random uuid primary key, only the foreign key index on sensor_id
+    uuid4 + composite index   random uuid primary key, (sensor_id, measuredAt, id) index
+    uuid7 + composite index   current: time ordered uuid primary key, (sensor_id, measuredAt, id) index
+    integer + composite index autoincrement primary key, (sensor_id, measuredAt, id) index
+Rows are inserted in time order in batches of 1000 spread over the sensors, the queries run on one sensor.
+    python benchmarks/measurement_index.py [--rows 10000 100000 1000000] [--sensors 10] [--package-size 50]
+"""
+import argparse
+import os
+import statistics
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from common import print_table, setup_django
+
+COLUMNS = '"measuredAt" datetime NULL, "value" real NOT NULL, "sensor_id" char(32) NOT NULL'
+SENSOR_INDEX = 'CREATE INDEX "measurement_sensor_idx" ON "measurement" ("sensor_id")'
+COMPOSITE_INDEX = 'CREATE INDEX "measurement_sensor_time_idx" ON "measurement" ("sensor_id", "measuredAt", "id")'
+
+
+def variants():
+    from fpf_sensor_service.utils.time_ordered_uuid import time_ordered_uuid
+
+    uuid_table = f'CREATE TABLE "measurement" ("id" char(32) NOT NULL PRIMARY KEY, {COLUMNS})'
+    integer_table = f'CREATE TABLE "measurement" ("id" integer NOT NULL PRIMARY KEY AUTOINCREMENT, {COLUMNS})'
+    return {
+        'uuid4 + sensor index': ([uuid_table, SENSOR_INDEX], lambda: uuid.uuid4().hex),
+        'uuid4 + composite index': ([uuid_table, COMPOSITE_INDEX], lambda: uuid.uuid4().hex),
+        'uuid7 + composite index': ([uuid_table, COMPOSITE_INDEX], lambda: time_ordered_uuid().hex),
+        'integer + composite index': ([integer_table, COMPOSITE_INDEX], None),
+    }
+
+
+def timed_median(cursor, sql: str, params: list, repeat: int = 20) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        cursor.execute(sql, params)
+        cursor.fetchall()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def run(path: str, statements: list[str], new_id, rows: int, sensors: int, package_size: int) -> tuple[list, dict]:
+    from django.conf import settings
+    from django.db.utils import ConnectionHandler
+
+    connections = ConnectionHandler({'default': {**settings.DATABASES['default'], 'NAME': path}})
+    connection = connections['default']
+    sensor_ids = [uuid.uuid4().hex for _ in range(sensors)]
+    start = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    with connection.cursor() as cursor:
+        for statement in statements:
+            cursor.execute(statement)
+
+    insert_start = time.perf_counter()
+    columns = '"measuredAt", "value", "sensor_id"' if new_id is None else '"id", "measuredAt", "value", "sensor_id"'
+    placeholders = ', '.join(['%s'] * len(columns.split(',')))
+    for offset in range(0, rows, 1000):
+        batch = []
+        for i in range(offset, min(offset + 1000, rows)):
+            row = [(start + timedelta(seconds=i)).isoformat(' '), float(i), sensor_ids[i % sensors]]
+            batch.append(row if new_id is None else [new_id()] + row)
+        with connection.cursor() as cursor:
+            cursor.execute('BEGIN IMMEDIATE')
+            cursor.executemany(f'INSERT INTO "measurement" ({columns}) VALUES ({placeholders})', batch)
+            cursor.execute('COMMIT')
+    insert_seconds = time.perf_counter() - insert_start
+
+    sensor_id = sensor_ids[0]
+    select = 'SELECT "id", "measuredAt", "value" FROM "measurement" WHERE "sensor_id" = %s AND "measuredAt" IS NOT NULL'
+    order = f'ORDER BY "measuredAt" ASC, "id" ASC LIMIT {package_size}'
+    queries = {}
+    with connection.cursor() as cursor:
+        queries['first package'] = (f'{select} {order}', [sensor_id])
+
+        cursor.execute('SELECT "id", "measuredAt" FROM "measurement" WHERE "sensor_id" = %s '
+                       'ORDER BY "measuredAt", "id" LIMIT 1 OFFSET %s', [sensor_id, rows // sensors // 2])
+        last_id, last_measured_at = cursor.fetchone()
+        queries['keyset package'] = (
+            f'{select} AND ("measuredAt" > %s OR ("measuredAt" = %s AND "id" > %s)) AND "measuredAt" >= %s {order}',
+            [sensor_id, last_measured_at, last_measured_at, last_id, last_measured_at],
+        )
+
+        cursor.execute(f'{select} {order}', [sensor_id])
+        ids = [row[0] for row in cursor.fetchall()]
+        queries['ack by pk'] = (f'SELECT "id" FROM "measurement" WHERE "id" IN ({", ".join(["%s"] * len(ids))})', ids)
+        queries['count'] = ('SELECT COUNT(*) FROM "measurement" WHERE "sensor_id" = %s', [sensor_id])
+
+        # move the pages out of the write ahead log, so the file size includes them
+        cursor.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+        timings = [f'{insert_seconds:.2f}s', f'{os.path.getsize(path) / 2 ** 20:.1f} MiB']
+        plans = {}
+        for name, (sql, params) in queries.items():
+            timings.append(f'{timed_median(cursor, sql, params) * 1000:.3f}ms')
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            plans[name] = '; '.join(row[-1] for row in cursor.fetchall())
+    connection.close()
+    return timings, plans
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--sensors', type=int, default=10)
+    parser.add_argument('--package-size', type=int, default=50)
+    args = parser.parse_args()
+
+    directory = setup_django()
+    header = ['rows', 'variant', 'insert', 'file size', 'first package', 'keyset package', 'ack by pk', 'count']
+    rows = []
+    plans = {}
+    for row_count in args.rows:
+        for i, (name, (statements, new_id)) in enumerate(variants().items()):
+            path = os.path.join(directory, f'{row_count}_{i}.sqlite3')
+            timings, plans[name] = run(path, statements, new_id, row_count, args.sensors, args.package_size)
+            os.remove(path)
+            rows.append([row_count, name] + timings)
+
+    print(f'{args.sensors} sensors, packages of {args.package_size}, median of 20 runs per query')
+    print_table(header, rows)
+    print(f'\nquery plans at {args.rows[-1]} rows')
+    for name, variant_plans in plans.items():
+        print(name)
+        for query, plan in variant_plans.items():
+            print(f'    {query}: {plan}')
+
+
+if __name__ == '__main__':
+    main()
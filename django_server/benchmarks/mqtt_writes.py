@@ -0,0 +1,97 @@
+"""
+Stores MQTT measurements arriving at a fixed rate, once with a transaction per message as before the
+MeasurementBatchWriter and once through it. Messages are handed to MQTT_CONFIG['WORKERS'] worker threads like
+in MQTTService, a rate of 0 puts all messages into the queue at once.
+The stored rate is messages divided by the time until the last one is in the database, at low rates the batch writer
+trades up to one batch window of latency for far fewer transactions.
+    python benchmarks/mqtt_writes.py [--rates 10 100 1000 0] [--seconds 3] [--sensors 20]
+"""
+import argparse
+import queue
+import threading
+import time
+import uuid
+
+from common import print_table, setup_django
+
+
+def run(handle, sensor_ids: list[str], rate: int, messages: int, workers: int) -> float:
+    from django.db import connection
+    from fpf_sensor_service.models import SensorMeasurement
+
+    SensorMeasurement.objects.all().delete()
+    inbox = queue.Queue()
+
+    def work():
+        while (message := inbox.get()) is not None:
+            handle(*message)
+        connection.close()
+
+    threads = [threading.Thread(target=work) for _ in range(workers)]
+    for thread in threads:
+        thread.start()
+
+    start = time.perf_counter()
+    for i in range(messages):
+        if rate:
+            delay = start + i / rate - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        inbox.put((sensor_ids[i % len(sensor_ids)], float(i)))
+    for _ in threads:
+        inbox.put(None)
+    for thread in threads:
+        thread.join()
+
+    while SensorMeasurement.objects.count() < messages:
+        time.sleep(0.005)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rates', type=int, nargs='+', default=[10, 100, 1000, 0], help='messages per second')
+    parser.add_argument('--seconds', type=float, default=3, help='duration per rate, bursts send as many as 1000 msgs/s')
+    parser.add_argument('--sensors', type=int, default=20)
+    args = parser.parse_args()
+
+    setup_django()
+    from django_server import settings
+    from fpf_sensor_service.models import SensorConfig, SensorMeasurement
+    from fpf_sensor_service.services.measurement_buffer_services import BufferedMeasurement
+    from fpf_sensor_service.services.measurement_writer_services import MeasurementBatchWriter
+
+    sensor_ids = [str(uuid.uuid4()) for _ in range(args.sensors)]
+    SensorConfig.objects.bulk_create([
+        SensorConfig(id=sensor_id, intervalSeconds=1, sensorClassId=uuid.uuid4()) for sensor_id in sensor_ids
+    ])
+    class CountingBatchWriter(MeasurementBatchWriter):
+        batches = 0
+
+        def _write(self, batch):
+            self.batches += 1
+            super()._write(batch)
+
+    writer = CountingBatchWriter()
+
+    def create(sensor_id, value):
+        SensorMeasurement.objects.create(sensor_id=sensor_id, value=value)
+
+    def add(sensor_id, value):
+        writer.add(BufferedMeasurement(sensor_id=sensor_id, value=value))
+
+    workers = settings.MQTT_CONFIG['WORKERS']
+    rows = []
+    for rate in args.rates:
+        messages = int((rate or 1000) * args.seconds)
+        writer.batches = 0
+        results = [messages / run(handle, sensor_ids, rate, messages, workers) for handle in (create, add)]
+        rows.append([rate or 'burst', messages] + [f'{result:,.0f}' for result in results] + [writer.batches])
+
+    print(f'{workers} workers, {args.sensors} sensors, batch window {settings.MEASUREMENT_WRITE_BATCH_WINDOW_MS}ms '
+          f'or {settings.MEASUREMENT_WRITE_BATCH_MAX_ROWS} rows')
+    print_table(['msgs/s', 'messages', 'stored/s per message', 'stored/s batch writer', 'batch transactions'], rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,34 @@
+"""
+Parallel writers and readers on a database file, once with the plain sqlite3 backend options
+(rollback journal, synchronous=FULL, 5s busy timeout) and once with the SQLITE_* profile from the settings.
+    python benchmarks/sqlite_concurrency.py [--writers 8] [--rows 500] [--readers 4]
+"""
+import argparse
+import os
+
+from common import print_table, setup_django
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--writers', type=int, default=8)
+    parser.add_argument('--rows', type=int, default=500, help='rows per writer, one transaction each')
+    parser.add_argument('--readers', type=int, default=4)
+    args = parser.parse_args()
+
+    directory = setup_django()
+    from django.conf import settings
+    from fpf_sensor_service.tests.sqlite_stress import run_sqlite_stress
+
+    rows = []
+    for name, options in [('plain', {}), ('profile', settings.DATABASES['default']['OPTIONS'])]:
+        result = run_sqlite_stress(os.path.join(directory, f'{name}.sqlite3'), args.writers, args.rows, args.readers, options)
+        rows.append([name, f'{result.written}/{args.writers * args.rows}', result.lock_errors,
+                     f'{result.seconds:.2f}s', f'{result.writes_per_second:,.0f}', f'{result.reads:,}'])
+
+    print(f'{args.writers} writers with {args.rows} transactions each, {args.readers} readers')
+    print_table(['options', 'written', 'lock errors', 'time', 'writes/s', 'reads'], rows)
+
+
+if __name__ == '__main__':
+    main()
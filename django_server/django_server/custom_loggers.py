@@ -1,9 +1,21 @@
+import collections
 import logging
+import threading
+from datetime import datetime, timezone
+
 import requests
-from django.utils import timezone
+
+from fpf_sensor_service.utils.http_utils import JsonBodyEncoder
+
 
 class APILogHandler(logging.Handler):
-    def __init__(self, api_url, fpf_id):
+    """
+    Relays log records to the dashboard backend without blocking the logging thread.
+    Records are buffered in a bounded queue and sent in batches by a background thread,
+    when the queue is full the oldest records get dropped and counted in dropped_records.
+    With batched the records of one api key are posted as a list, otherwise every record is posted on its own.
+    """
+    def __init__(self, api_url, fpf_id, queue_size=1000, batch_size=50, flush_interval=5, timeout=10, content_encoding='identity', batched=False):
         super().__init__()
         self.api_url = api_url
 
@@ -11,36 +23,99 @@ class APILogHandler(logging.Handler):
         # since we don't have access to the model at this stage and django messages don't have the extra info
         self.fpf_id = fpf_id
 
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.timeout = timeout
+        self.batched = batched
+        self.dropped_records = 0
+        self.failed_records = 0
+
+        self._encoder = JsonBodyEncoder(content_encoding)
+        self._session = requests.Session()
+        self._queue = collections.deque(maxlen=queue_size)
+        self._condition = threading.Condition()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
     '''
     I was hoping to also be able to relay *default* django logs to the dashboard through this, but since it relies on the extra info api_key that's out...
     is there a way to remedy this and retrieve fpfId/apikey here?
     '''
     def emit(self, record):
-        log_entry = self.format(record)
         extra_info = getattr(record, 'extra', {})
         if not 'api_key' in extra_info:
             return
 
-        payload = {
-            'message': log_entry,
-            'level': record.levelname,
-            'createdAt': timezone.now().isoformat(),
-        }
+        try:
+            payload = {
+                'message': self.format(record),
+                'level': record.levelname,
+                'createdAt': datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            }
+
+            if 'fpfId' in extra_info:
+                payload['fpfId'] = str(extra_info['fpfId'])
+            elif self.fpf_id != '':
+                payload['fpfId'] = self.fpf_id
 
-        if 'fpfId' in extra_info:
-            payload['fpfId'] = str(extra_info['fpfId'])
-        elif self.fpf_id != '':
-            payload['fpfId'] = self.fpf_id
+            if 'sensorId' in extra_info:
+                payload['sensorId'] = str(extra_info['sensorId'])
 
-        if 'sensorId' in extra_info:
-            payload['sensorId'] = str(extra_info['sensorId'])
+            with self._condition:
+                if len(self._queue) == self._queue.maxlen:
+                    self.dropped_records += 1
+                self._queue.append((extra_info['api_key'], payload))
+                if len(self._queue) >= self.batch_size:
+                    self._condition.notify()
+        except Exception:
+            self.handleError(record)
 
+    def flush(self):
+        with self._condition:
+            self._condition.notify()
+
+    def close(self):
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        self._thread.join(self.timeout)
+        super().close()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                if not self._closed and len(self._queue) < self.batch_size:
+                    self._condition.wait(self.flush_interval)
+                if self._closed and not self._queue:
+                    return
+                batch = [self._queue.popleft() for _ in range(min(self.batch_size, len(self._queue)))]
+
+            self._send_batch(batch)
+
+    def _send_batch(self, batch):
+        payloads_by_api_key = collections.defaultdict(list)
+        for api_key, payload in batch:
+            payloads_by_api_key[api_key].append(payload)
+
+        for api_key, payloads in payloads_by_api_key.items():
+            if self.batched:
+                self._post(api_key, payloads, len(payloads))
+            else:
+                for payload in payloads:
+                    self._post(api_key, payload, 1)
+
+    def _post(self, api_key, body, record_count):
         try:
-            requests.post(self.api_url, json=payload, headers={
-                'Authorization': f"ApiKey {extra_info['api_key']}"
+            response = self._encoder.post(self._session, self.api_url, body, timeout=self.timeout, headers={
+                'Authorization': f"ApiKey {api_key}"
             })
-        except requests.RequestException as e:
-            pass # ignore here, to log somewhere locally another logger can be configured
+        except requests.RequestException:
+            self.failed_records += record_count # ignore here, to log somewhere locally another logger can be configured
+            return
+
+        if not 200 <= response.status_code < 300:
+            self.failed_records += record_count
 
 
 class CustomConsoleLogger(logging.StreamHandler):
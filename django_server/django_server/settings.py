@@ -60,10 +60,34 @@ started using runserver as daphne is supposed to be production ready.
 '''
 ASGI_APPLICATION = 'django_server.asgi.application'
 
+'''
+The scheduler, the mqtt workers and the views all write to the same SQLite database. In WAL journal mode readers don't
+block the writer, synchronous=NORMAL only syncs on checkpoints instead of on every commit (safe in WAL mode, an OS crash
+can lose the last commits but never corrupts the database) and writers wait up to SQLITE_BUSY_TIMEOUT_S seconds for the
+lock instead of failing with "database is locked". Write transactions take the lock right away (IMMEDIATE), so they
+can't fail halfway when upgrading a read to a write lock.
+SQLITE_CACHE_SIZE_KIB is the page cache per connection and SQLITE_MMAP_SIZE the bytes of the file read via mmap.
+'''
+SQLITE_JOURNAL_MODE = env('SQLITE_JOURNAL_MODE', default='WAL')
+SQLITE_SYNCHRONOUS = env('SQLITE_SYNCHRONOUS', default='NORMAL')
+SQLITE_BUSY_TIMEOUT_S = env.int('SQLITE_BUSY_TIMEOUT_S', default=20)
+SQLITE_CACHE_SIZE_KIB = env.int('SQLITE_CACHE_SIZE_KIB', default=8192)
+SQLITE_MMAP_SIZE = env.int('SQLITE_MMAP_SIZE', default=64 * 1024 * 1024)
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        'OPTIONS': {
+            'timeout': SQLITE_BUSY_TIMEOUT_S,
+            'transaction_mode': 'IMMEDIATE',
+            'init_command': (
+                f'PRAGMA journal_mode={SQLITE_JOURNAL_MODE};'
+                f'PRAGMA synchronous={SQLITE_SYNCHRONOUS};'
+                f'PRAGMA cache_size=-{SQLITE_CACHE_SIZE_KIB};'
+                f'PRAGMA mmap_size={SQLITE_MMAP_SIZE};'
+            ),
+        },
     }
 }
 
@@ -81,9 +105,100 @@ DEBUG = env('DEBUG', default='True') == 'True'
 
 MEASUREMENTS_BASE_URL = env('MEASUREMENTS_BASE_URL')
 GENERATE_MEASUREMENTS = env('GENERATE_MEASUREMENTS', default='False') == 'True'
-MEASUREMENT_PACKAGE_SIZE = env('MEASUREMENT_PACKAGE_SIZE', default=50)
-MEASUREMENT_RETRY_COUNT = env('MEASUREMENT_RETRY_COUNT', default=3)
-MEASUREMENT_RETRY_SLEEP_BETWEEN_S = env('MEASUREMENT_RETRY_SLEEP_BETWEEN_S', default=5)
+MEASUREMENT_PACKAGE_SIZE = env.int('MEASUREMENT_PACKAGE_SIZE', default=50)
+'''
+UPLOAD_CONTENT_ENCODING compresses the measurement and log uploads to the dashboard backend: identity, gzip, zstd
+(requires the zstandard package) or auto for the best available. The backend answering 415 switches back to identity.
+MEASUREMENT_PAYLOAD_FORMAT 'columnar' sends one array of unix timestamps (ms) and one of values per sensor
+instead of a list of rows with iso timestamps.
+'''
+UPLOAD_CONTENT_ENCODING = env('UPLOAD_CONTENT_ENCODING', default='identity')
+MEASUREMENT_PAYLOAD_FORMAT = env('MEASUREMENT_PAYLOAD_FORMAT', default='rows')
+'''
+Clients may reuse the sensor types for SENSOR_TYPES_MAX_AGE_S seconds before revalidating them with If-None-Match.
+'''
+SENSOR_TYPES_MAX_AGE_S = env.int('SENSOR_TYPES_MAX_AGE_S', default=300)
+'''
+New measurements get time ordered (version 7) UUIDs as primary key so inserts append to the index,
+set MEASUREMENT_ID_TIME_ORDERED=False to go back to random uuid4 ids.
+'''
+MEASUREMENT_ID_TIME_ORDERED = env('MEASUREMENT_ID_TIME_ORDERED', default='True') == 'True'
+'''
+MEASUREMENT_BUFFER_BACKEND selects where measurements wait for their upload: 'orm' keeps them as SensorMeasurement rows,
+'segment_log' appends them as fixed size records to segment files in MEASUREMENT_BUFFER_PATH,
+each holding up to MEASUREMENT_BUFFER_SEGMENT_RECORDS records.
+'''
+MEASUREMENT_BUFFER_BACKEND = env('MEASUREMENT_BUFFER_BACKEND', default='orm')
+MEASUREMENT_BUFFER_PATH = env('MEASUREMENT_BUFFER_PATH', default=os.path.join(BASE_DIR, 'measurement_buffer'))
+MEASUREMENT_BUFFER_SEGMENT_RECORDS = env.int('MEASUREMENT_BUFFER_SEGMENT_RECORDS', default=65536)
+'''
+Retention policy for measurements that couldn't be uploaded yet, enforced every MEASUREMENT_RETENTION_INTERVAL_S seconds.
+Pending measurements older than MEASUREMENT_RETENTION_MAX_AGE_S are dropped, as are the oldest ones above
+MEASUREMENT_RETENTION_MAX_ROWS or MEASUREMENT_RETENTION_MAX_BYTES per sensor. Measurements older than
+MEASUREMENT_DOWNSAMPLE_AFTER_S are reduced to their min, max and mean per MEASUREMENT_DOWNSAMPLE_BUCKET_S bucket.
+The mean is written over the value of a reading from the middle of the bucket and keeps its timestamp, the dashboard
+backend gets no marker for it, so a downsampled backlog looks like raw readings taken less often.
+0 disables a limit, sensors can override them with a "retention" dict in their additionalInformation
+(maxAgeSeconds, maxRows, maxBytes, downsampleAfterSeconds, downsampleBucketSeconds).
+'''
+MEASUREMENT_RETENTION_INTERVAL_S = env.int('MEASUREMENT_RETENTION_INTERVAL_S', default=600)
+MEASUREMENT_RETENTION_MAX_AGE_S = env.int('MEASUREMENT_RETENTION_MAX_AGE_S', default=0)
+MEASUREMENT_RETENTION_MAX_ROWS = env.int('MEASUREMENT_RETENTION_MAX_ROWS', default=0)
+MEASUREMENT_RETENTION_MAX_BYTES = env.int('MEASUREMENT_RETENTION_MAX_BYTES', default=0)
+MEASUREMENT_DOWNSAMPLE_AFTER_S = env.int('MEASUREMENT_DOWNSAMPLE_AFTER_S', default=0)
+MEASUREMENT_DOWNSAMPLE_BUCKET_S = env.int('MEASUREMENT_DOWNSAMPLE_BUCKET_S', default=300)
+'''
+A failed sensor poll is retried up to MEASUREMENT_RETRY_COUNT attempts in total, the delay before a retry starts at
+MEASUREMENT_RETRY_SLEEP_BETWEEN_S and doubles with every attempt (with random jitter) up to MEASUREMENT_RETRY_MAX_SLEEP_S.
+The retries per sensor are logged every MEASUREMENT_RETRY_SUMMARY_INTERVAL_S seconds, 0 disables the summary.
+'''
+MEASUREMENT_RETRY_COUNT = env.int('MEASUREMENT_RETRY_COUNT', default=3)
+MEASUREMENT_RETRY_SLEEP_BETWEEN_S = env.int('MEASUREMENT_RETRY_SLEEP_BETWEEN_S', default=5)
+MEASUREMENT_RETRY_MAX_SLEEP_S = env.int('MEASUREMENT_RETRY_MAX_SLEEP_S', default=60)
+MEASUREMENT_RETRY_SUMMARY_INTERVAL_S = env.int('MEASUREMENT_RETRY_SUMMARY_INTERVAL_S', default=3600)
+'''
+Sensors are polled by APScheduler worker threads by default, SENSOR_POLLING_ENGINE=asyncio runs all sensor jobs on one
+event loop instead. SENSOR_POLLING_TIMEOUT_S limits how long a single poll may take with the asyncio engine.
+'''
+SENSOR_POLLING_ENGINE = env('SENSOR_POLLING_ENGINE', default='apscheduler')
+SENSOR_POLLING_TIMEOUT_S = env.int('SENSOR_POLLING_TIMEOUT_S', default=30)
+'''
+Measurements are only stored locally by the sensor tasks and the MQTT service, a separate background uploader
+sends everything that is pending to the dashboard backend every MEASUREMENT_UPLOAD_INTERVAL_S seconds.
+'''
+MEASUREMENT_UPLOAD_INTERVAL_S = env.int('MEASUREMENT_UPLOAD_INTERVAL_S', default=30)
+'''
+With MEASUREMENT_UPLOAD_BATCHED the uploader sends the pending measurements of all sensors in one request to
+/api/measurements keyed by sensor id, the dashboard backend has to acknowledge every sensor on its own.
+'''
+MEASUREMENT_UPLOAD_BATCHED = env('MEASUREMENT_UPLOAD_BATCHED', default='False') == 'True'
+'''
+Measurements arriving in bursts (MQTT) are collected for up to MEASUREMENT_WRITE_BATCH_WINDOW_MS milliseconds
+or MEASUREMENT_WRITE_BATCH_MAX_ROWS rows and written to the db in one transaction.
+'''
+MEASUREMENT_WRITE_BATCH_WINDOW_MS = env.int('MEASUREMENT_WRITE_BATCH_WINDOW_MS', default=100)
+MEASUREMENT_WRITE_BATCH_MAX_ROWS = env.int('MEASUREMENT_WRITE_BATCH_MAX_ROWS', default=500)
+
+'''
+All outgoing http requests share one session, HTTP_POOL_CONNECTIONS is the amount of hosts a connection pool is kept for
+and HTTP_POOL_MAXSIZE the amount of keep-alive connections per host.
+'''
+HTTP_POOL_CONNECTIONS = env.int('HTTP_POOL_CONNECTIONS', default=20)
+HTTP_POOL_MAXSIZE = env.int('HTTP_POOL_MAXSIZE', default=10)
+
+'''
+Sensor hosts and the dashboard backend each get a circuit breaker, after CIRCUIT_BREAKER_FAILURE_THRESHOLD consecutive
+failures requests to them are skipped until a probe after CIRCUIT_BREAKER_RESET_TIMEOUT_S seconds succeeds again.
+'''
+CIRCUIT_BREAKER_FAILURE_THRESHOLD = env.int('CIRCUIT_BREAKER_FAILURE_THRESHOLD', default=3)
+CIRCUIT_BREAKER_RESET_TIMEOUT_S = env.int('CIRCUIT_BREAKER_RESET_TIMEOUT_S', default=60)
+
+'''
+Every request to the dashboard backend gives up after DASHBOARD_CONNECT_TIMEOUT_S seconds without a connection or
+DASHBOARD_READ_TIMEOUT_S seconds without an answer, so a stalled mobile connection can't block the uploads forever.
+'''
+DASHBOARD_CONNECT_TIMEOUT_S = env.int('DASHBOARD_CONNECT_TIMEOUT_S', default=10)
+DASHBOARD_READ_TIMEOUT_S = env.int('DASHBOARD_READ_TIMEOUT_S', default=30)
 
 '''
 DASHBOARD_BACKEND_USER_ID and RESOURCE_SERVER_INTROSPECTION_URL are intended to be used with an external identity server
@@ -94,6 +209,12 @@ to an env for the FPF and the Dashboard backend in the future.s
 '''
 # DASHBOARD_BACKEND_USER_ID = env('DASHBOARD_BACKEND_USER_ID')
 
+'''
+Up to ACCESS_TOKEN_CACHE_MAX_SIZE validated access tokens are kept in memory (see AccessTokenCache in
+custom_oauth_validator.py), each at most for RESOURCE_SERVER_TOKEN_CACHING_SECONDS and never beyond its expiry.
+'''
+ACCESS_TOKEN_CACHE_MAX_SIZE = env.int('ACCESS_TOKEN_CACHE_MAX_SIZE', default=128)
+
 OAUTH2_PROVIDER = {
     'SCOPES': {"openid": ''},
     'RESOURCE_SERVER_INTROSPECTION_URL': env('RESOURCE_SERVER_INTROSPECTION_URL', default='https://development-isse-identityserver.azurewebsites.net/connect/introspect'),
@@ -112,8 +233,21 @@ MQTT_CONFIG = {
     "PORT": env.int("MQTT_PORT", default=1883),
     "USERNAME": env("MQTT_USERNAME", default=None),
     "PASSWORD": env("MQTT_PASSWORD", default=None),
+    # messages are processed by a worker pool instead of the network thread, see MQTTService
+    "WORKERS": env.int("MQTT_WORKERS", default=2),
+    "QUEUE_SIZE": env.int("MQTT_QUEUE_SIZE", default=1000),
+    # what happens with new messages while the queue is full: drop_oldest, drop_newest or block
+    "BACKPRESSURE": env("MQTT_BACKPRESSURE", default="drop_oldest"),
+    # the received and dropped messages are logged every STATS_INTERVAL_S seconds, 0 disables it
+    "STATS_INTERVAL_S": env.int("MQTT_STATS_INTERVAL_S", default=3600),
 }
 
+'''
+Log records for the dashboard backend are queued and posted by a background thread. With API_LOG_BATCHED the queued
+records of one api key are posted together as a json list to /api/log_messages, otherwise every record on its own.
+'''
+API_LOG_BATCHED = env('API_LOG_BATCHED', default='False') == 'True'
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
@@ -153,6 +287,11 @@ LOGGING = {
             'class': 'django_server.custom_loggers.APILogHandler',
             'api_url': f'{MEASUREMENTS_BASE_URL}/api/log_messages',
             'fpf_id': '',
+            'queue_size': env.int('API_LOG_QUEUE_SIZE', default=1000),
+            'batch_size': env.int('API_LOG_BATCH_SIZE', default=50),
+            'flush_interval': env.int('API_LOG_FLUSH_INTERVAL_S', default=5),
+            'batched': API_LOG_BATCHED,
+            'content_encoding': UPLOAD_CONTENT_ENCODING,
             'formatter': 'message_only',
         },
     },
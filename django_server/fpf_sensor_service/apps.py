@@ -46,6 +46,14 @@ class SensorAppConfig(AppConfig):
                         self.log.info("MQTT Service started successfully.")
                     except Exception as e:
                         self.log.error(f"Error starting MQTTService: {e}")
+
+                    try:
+                        from fpf_sensor_service.services.measurement_upload_services import MeasurementUploadService
+                        upload_service = MeasurementUploadService()
+                        upload_service.start()
+                        self.log.info("Measurement upload service started successfully.")
+                    except Exception as e:
+                        self.log.error(f"Error starting MeasurementUploadService: {e}")
                     break
             except OperationalError as e:
                 self.log.error(f"Database not ready yet: {e}")
@@ -1,12 +1,16 @@
 import base64
+import hashlib
 import logging
 import http.client
+import threading
 import uuid
+from collections import OrderedDict
 from datetime import datetime, timedelta
 
 import requests
 from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.utils import timezone
 from django.utils.timezone import make_aware
 from oauth2_provider.models import get_access_token_model
 from oauth2_provider.oauth2_validators import OAuth2Validator
@@ -19,7 +23,65 @@ log = logging.getLogger("oauth2_provider")
 AccessToken = get_access_token_model()
 UserModel = get_user_model()
 
+class AccessTokenCache:
+    """
+    Validated access tokens kept in memory, so repeated requests with the same token skip the database lookup
+    as well as the introspection request and its token/user writes.
+    Entries expire with the token, at the latest after RESOURCE_SERVER_TOKEN_CACHING_SECONDS,
+    and the least recently used entry is evicted once max_size tokens are cached.
+    """
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._entries: OrderedDict[str, tuple[datetime, AccessToken]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, token: str) -> AccessToken or None:
+        key = self._get_key(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            cached_until, access_token = entry
+            if cached_until <= timezone.now():
+                del self._entries[key]
+                return None
+
+            self._entries.move_to_end(key)
+            return access_token
+
+    def put(self, token: str, access_token: AccessToken):
+        cached_until = timezone.now() + timedelta(seconds=oauth2_settings.RESOURCE_SERVER_TOKEN_CACHING_SECONDS)
+        if access_token.expires is not None and access_token.expires < cached_until:
+            cached_until = access_token.expires
+
+        key = self._get_key(token)
+        with self._lock:
+            self._entries[key] = (cached_until, access_token)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    @staticmethod
+    def _get_key(token: str) -> str:
+        # don't keep the raw bearer tokens around in memory
+        return hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+
+access_token_cache = AccessTokenCache(max_size=settings.ACCESS_TOKEN_CACHE_MAX_SIZE)
+
+
 class CustomOAuth2Validator(OAuth2Validator):
+    def _load_access_token(self, token):
+        access_token = access_token_cache.get(token)
+        if access_token is not None:
+            return access_token
+
+        access_token = super()._load_access_token(token)
+        if access_token is not None and not access_token.is_expired():
+            access_token_cache.put(token, access_token)
+        return access_token
+
     def _get_token_from_authentication_server(
             self, token, introspection_url, introspection_token, introspection_credentials
     ):
@@ -56,6 +118,7 @@ class CustomOAuth2Validator(OAuth2Validator):
                 },
             )
 
+            access_token_cache.put(token, access_token)
             return access_token
 
 
@@ -126,4 +189,5 @@ class CustomOAuth2Validator(OAuth2Validator):
                 },
             )
 
+            access_token_cache.put(token, access_token)
             return access_token
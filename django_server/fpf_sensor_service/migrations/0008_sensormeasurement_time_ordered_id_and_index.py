@@ -0,0 +1,23 @@
+# Generated by Django 5.1.2 on 2026-10-18 12:00
+
+import fpf_sensor_service.utils.time_ordered_uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fpf_sensor_service', '0007_sensorconfig_isactive_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='sensormeasurement',
+            name='id',
+            field=models.UUIDField(auto_created=True, default=fpf_sensor_service.utils.time_ordered_uuid.time_ordered_uuid, editable=False, primary_key=True, serialize=False),
+        ),
+        migrations.AddIndex(
+            model_name='sensormeasurement',
+            index=models.Index(fields=['sensor', 'measuredAt', 'id'], name='measurement_sensor_time_idx'),
+        ),
+    ]
@@ -1,13 +1,19 @@
-import uuid
 from django.db import models
 from .sensor_config import SensorConfig
+from fpf_sensor_service.utils.time_ordered_uuid import time_ordered_uuid
 
 
 class SensorMeasurement(models.Model):
     """
-    SensorMeasurement model with the id as a GUID, the measuredAt as an autofilled Date and the value as a float
+    SensorMeasurement model with the id as a time ordered GUID, the measuredAt as an autofilled Date and the value as a float
     """
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False, auto_created=True)
+    id = models.UUIDField(primary_key=True, default=time_ordered_uuid, editable=False, auto_created=True)
     sensor = models.ForeignKey(SensorConfig, on_delete=models.DO_NOTHING)
     measuredAt = models.DateTimeField(null=True, blank=True, auto_now_add=True)
     value = models.FloatField()
+
+    class Meta:
+        indexes = [
+            # pending measurements are always read per sensor ordered by (measuredAt, id)
+            models.Index(fields=['sensor', 'measuredAt', 'id'], name='measurement_sensor_time_idx'),
+        ]
@@ -1,8 +1,5 @@
 import json
 
-import requests
-
-from . import MeasurementResult
 from .typed_sensor import TypedSensor
 from .sensor_description import SensorDescription, ConnectionType, FieldDescription, FieldType, ValidHttpEndpointRule
 from .http_sensor import HttpSensor
@@ -29,8 +26,3 @@ class HttpA0221AULevelSensor(HttpSensor):
                 ),
             ]
         )
-
-    def get_measurement(self)-> MeasurementResult:
-        response = requests.get(self.http_endpoint)
-        response.raise_for_status()
-        return MeasurementResult(value=response.json().get("value"))
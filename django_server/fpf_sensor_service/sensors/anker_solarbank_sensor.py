@@ -1,12 +1,98 @@
 import json
 import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Hashable
+
 from aiohttp import ClientSession
+from django_server import settings
 
 from fpf_sensor_service.utils import get_logger
 from fpf_sensor_service.sensors import HttpSensor, MeasurementResult
 from fpf_sensor_service.sensors.sensor_description import SensorDescription, ConnectionType, FieldDescription, FieldType
 
-from anker_solix_api.api import api
+from anker_solix_api.api import api, errors
+
+
+class AnkerEventLoop:
+    """
+    The anker api library is async only, instead of a new event loop, http session and login per poll
+    all anker requests run on this one long-lived loop in a background thread.
+    """
+    def __init__(self):
+        self.http_session: ClientSession = None
+        self._loop: asyncio.AbstractEventLoop = None
+        self._lock = threading.Lock()
+
+    def submit(self, coroutine) -> Future:
+        """
+        Schedule the coroutine on the anker loop, the returned concurrent future can be waited on from any thread.
+        """
+        with self._lock:
+            if self._loop is None:
+                started = threading.Event()
+                threading.Thread(target=self._run, args=(started,), daemon=True).start()
+                started.wait()
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop)
+
+    def _run(self, started: threading.Event):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        self._loop.run_until_complete(self._open_http_session())
+        started.set()
+        self._loop.run_forever()
+
+    async def _open_http_session(self):
+        self.http_session = ClientSession()
+
+
+class AnkerAccount:
+    """
+    Logged in api client of one Anker account, shared by all sensors of that account.
+    One refresh of the sites and device details serves every sensor polling within max_age_seconds,
+    the client only logs in again once the cloud rejects its authorization.
+    """
+    def __init__(self, email: str, password: str, country: str):
+        self.email = email
+        self.password = password
+        self.country = country
+        self._api: api.AnkerSolixApi = None
+        self._refreshed_at = None
+        self._lock = asyncio.Lock()
+
+    async def get_devices(self, max_age_seconds: float) -> dict:
+        async with self._lock:
+            now = asyncio.get_running_loop().time()
+            if self._refreshed_at is None or now - self._refreshed_at >= max_age_seconds:
+                try:
+                    await self._refresh()
+                except errors.AuthorizationError:
+                    # the login expired or was revoked, start over with a new login
+                    self._api = None
+                    await self._refresh()
+            return self._api.devices
+
+    async def _refresh(self):
+        if self._api is None:
+            self._api = api.AnkerSolixApi(
+                self.email, self.password, self.country, anker_event_loop.http_session, get_logger()
+            )
+        await self._api.update_sites()
+        await self._api.update_device_details()
+        self._refreshed_at = asyncio.get_running_loop().time()
+
+
+anker_event_loop = AnkerEventLoop()
+anker_accounts: dict[tuple, AnkerAccount] = {}
+anker_accounts_lock = threading.Lock()
+
+
+def get_anker_account(email: str, password: str, country: str) -> AnkerAccount:
+    with anker_accounts_lock:
+        key = (email, password, country)
+        if key not in anker_accounts:
+            anker_accounts[key] = AnkerAccount(email, password, country)
+        return anker_accounts[key]
 
 
 class AnkerSolarbankPowerSensor(HttpSensor):
@@ -56,16 +142,38 @@ class AnkerSolarbankPowerSensor(HttpSensor):
             ]
         )
 
-    async def _get_measurement_async(self):
-        async with ClientSession() as websession:
-            myapi = api.AnkerSolixApi(
-                self.account, self.password, self.country, websession, self.logger
-            )
-            await myapi.update_sites()
-            await myapi.update_device_details()
-            self.value = myapi.devices[self.serial]['battery_energy']
+    def get_device_key(self) -> Hashable:
+        return 'anker', self.account, self.password, self.country
+
+    def get_circuit_key(self) -> str:
+        return f'anker:{self.account}'
 
     def get_measurement(self):
-        asyncio.run(self._get_measurement_async())
-        return MeasurementResult(value=self.value)
+        return self.get_measurements([self])[0]
+
+    def get_measurements(self, sensors: list['AnkerSolarbankPowerSensor']) -> list[MeasurementResult]:
+        devices = self._submit_get_devices().result(timeout=settings.SENSOR_POLLING_TIMEOUT_S)
+        return self._read_measurements(sensors, devices)
 
+    async def get_measurements_async(self, sensors: list['AnkerSolarbankPowerSensor'], http_session) -> list[MeasurementResult]:
+        # awaits the anker loop without blocking a worker thread
+        devices = await asyncio.wrap_future(self._submit_get_devices())
+        return self._read_measurements(sensors, devices)
+
+    def _submit_get_devices(self) -> Future:
+        account = get_anker_account(self.account, self.password, self.country)
+        # sensors of the account polled with a different interval still share a refresh that is recent enough
+        return anker_event_loop.submit(account.get_devices(max_age_seconds=self.sensor_config.intervalSeconds * 0.9))
+
+    @staticmethod
+    def _read_measurements(sensors: list['AnkerSolarbankPowerSensor'], devices: dict) -> list[MeasurementResult]:
+        if len(sensors) == 1 and sensors[0].serial not in devices:
+            raise ValueError(f'Anker device {sensors[0].serial} not found in account.')
+
+        return [
+            MeasurementResult(
+                value=devices[sensor.serial]['battery_energy'] if sensor.serial in devices else None,
+                sensor_id=str(sensor.sensor_config.id),
+            )
+            for sensor in sensors
+        ]
@@ -1,7 +1,5 @@
 import json
 
-import requests
-
 from .measurement_result import MeasurementResult
 from .typed_sensor import TypedSensor
 from .sensor_description import SensorDescription, ConnectionType, FieldDescription, FieldType, ValidHttpEndpointRule
@@ -54,7 +52,7 @@ class HttpMqttSensor(TypedSensor):
                     return MeasurementResult(value=value)
 
             else: #process http
-                response = requests.get(self.http_endpoint, timeout=10)
+                response = self.http_session.get(self.http_endpoint, timeout=10)
                 response.raise_for_status()
                 return MeasurementResult(value=response.json().get("value"))
 
@@ -1,6 +1,6 @@
 import json
 
-import requests
+import aiohttp
 
 from .measurement_result import MeasurementResult
 from .typed_sensor import TypedSensor
@@ -9,6 +9,8 @@ from .sensor_description import SensorDescription, ConnectionType, FieldDescript
 
 class HttpSensor(TypedSensor):
     http_endpoint = None
+    # key of the measured value in the json response of the endpoint
+    value_key = "value"
 
     def init_additional_information(self):
         additional_information = json.loads(self.sensor_config.additionalInformation)
@@ -37,6 +39,18 @@ class HttpSensor(TypedSensor):
         )
 
     def get_measurement(self) -> MeasurementResult:
-        response = requests.get(self.http_endpoint, timeout=10)
+        response = self.http_session.get(self.http_endpoint, timeout=10)
         response.raise_for_status()
-        return MeasurementResult(value=response.json().get("value"))
+        return MeasurementResult(value=response.json().get(self.value_key))
+
+    async def get_measurements_async(self, sensors: list[TypedSensor], http_session: aiohttp.ClientSession) -> list[MeasurementResult]:
+        # subclasses reading their values differently keep using their own get_measurement(s) in a worker thread
+        sensor_class = type(self)
+        if (sensor_class.get_measurement is not HttpSensor.get_measurement
+                or sensor_class.get_measurements is not TypedSensor.get_measurements):
+            return await super().get_measurements_async(sensors, http_session)
+
+        async with http_session.get(self.http_endpoint) as response:
+            response.raise_for_status()
+            data = await response.json(content_type=None)
+        return [MeasurementResult(value=data.get(self.value_key), sensor_id=str(self.sensor_config.id))]
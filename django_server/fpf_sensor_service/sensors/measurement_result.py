@@ -6,3 +6,5 @@ from datetime import datetime
 class MeasurementResult:
     value: float
     timestamp: Optional[datetime] = None
+    # set by get_measurements() to tell which of the polled sensors the value belongs to
+    sensor_id: Optional[str] = None
@@ -0,0 +1,89 @@
+import json
+import threading
+
+
+class ReportingFilter:
+    """
+    Decides which readings of a sensor are worth storing, configured by the optional "reporting" dict of the
+    sensor's additionalInformation, e.g. {"reporting": {"deadband": 0.05, "heartbeatSeconds": 3600}}:
+    - deadband / deadbandPercent: a reading is only stored if it differs by at least that much (absolute or percent)
+      from the last stored one, the larger of both thresholds applies
+    - heartbeatSeconds: a reading is stored anyway once that long has passed since the last stored one,
+      without a deadband unchanged readings are only stored by the heartbeat
+    - maxRateOfChange: a reading changing faster than this per second compared to the last stored one is treated
+      as implausible and only stored if the following reading confirms the jump
+    Without any configured option every reading is stored.
+    """
+    def __init__(self, deadband: float = 0, deadband_percent: float = 0, heartbeat_seconds: float = 0,
+                 max_rate_of_change: float = 0):
+        self.deadband = deadband
+        self.deadband_percent = deadband_percent
+        self.heartbeat_seconds = heartbeat_seconds
+        self.max_rate_of_change = max_rate_of_change
+
+        self._last_value = None
+        self._last_time = None
+        self._suspect = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def from_additional_information(additional_information: str) -> 'ReportingFilter':
+        try:
+            reporting = json.loads(additional_information or '{}').get('reporting') or {}
+        except (ValueError, AttributeError):
+            reporting = {}
+
+        return ReportingFilter(
+            deadband=float(reporting.get('deadband', 0)),
+            deadband_percent=float(reporting.get('deadbandPercent', 0)),
+            heartbeat_seconds=float(reporting.get('heartbeatSeconds', 0)),
+            max_rate_of_change=float(reporting.get('maxRateOfChange', 0)),
+        )
+
+    def is_active(self) -> bool:
+        return bool(self.deadband or self.deadband_percent or self.heartbeat_seconds or self.max_rate_of_change)
+
+    def accept(self, value: float, timestamp: float) -> bool:
+        """
+        :param timestamp: unix timestamp of the reading in seconds
+        :return: True if the reading should be stored
+        """
+        if not self.is_active():
+            return True
+
+        with self._lock:
+            if self._last_value is None:
+                return self._report(value, timestamp)
+
+            elapsed = timestamp - self._last_time
+            if self.max_rate_of_change and self._exceeds_rate(self._last_value, self._last_time, value, timestamp):
+                suspect = self._suspect
+                if suspect is None or self._exceeds_rate(*suspect, value, timestamp):
+                    self._suspect = (value, timestamp)
+                    return False
+            self._suspect = None
+
+            if self.heartbeat_seconds and elapsed >= self.heartbeat_seconds:
+                return self._report(value, timestamp)
+
+            if not (self.deadband or self.deadband_percent or self.heartbeat_seconds):
+                # only the rate of change is limited
+                return self._report(value, timestamp)
+
+            # a threshold of 0 (no deadband or a percentage of 0) still suppresses unchanged readings
+            threshold = max(self.deadband, abs(self._last_value) * self.deadband_percent / 100)
+            change = abs(value - self._last_value)
+            if change >= threshold if threshold else change > 0:
+                return self._report(value, timestamp)
+            return False
+
+    def _exceeds_rate(self, from_value: float, from_time: float, value: float, timestamp: float) -> bool:
+        elapsed = timestamp - from_time
+        if elapsed <= 0:
+            return value != from_value
+        return abs(value - from_value) / elapsed > self.max_rate_of_change
+
+    def _report(self, value: float, timestamp: float) -> bool:
+        self._last_value = value
+        self._last_time = timestamp
+        return True
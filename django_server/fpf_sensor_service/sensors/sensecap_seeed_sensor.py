@@ -1,13 +1,18 @@
+import hashlib
 import json
-import requests
+from datetime import datetime, timezone
+from typing import Hashable
 from dateutil.parser import parse as parse_datetime
-from datetime import datetime
 
+from fpf_sensor_service.utils.fetch_cache import SharedFetchCache
 from .measurement_result import MeasurementResult
 from .typed_sensor import TypedSensor
 from .sensor_description import SensorDescription, ConnectionType, FieldDescription, FieldType, ValidHttpEndpointRule
 
 
+sensecap_points_cache = SharedFetchCache()
+
+
 class SenseCapSeeedSensor(TypedSensor):
     http_endpoint = None
     sensor_id = None
@@ -56,37 +61,83 @@ class SenseCapSeeedSensor(TypedSensor):
             ]
         )
 
-    def get_measurement(self) -> MeasurementResult:
+    def get_device_key(self) -> Hashable:
+        return 'sensecap', self.http_endpoint, self.username, self.password
+
+    def get_circuit_key(self) -> str:
+        # gateways share the SenseCap cloud host, a failing gateway must not open the circuit for the others
+        return 'sensecap:' + hashlib.sha1(repr(self.get_device_key()).encode('utf-8')).hexdigest()
 
-        response = requests.get(
+    def get_measurement(self) -> MeasurementResult:
+        return self._read_measurement(self._get_newest_points())
+
+    def get_measurements(self, sensors: list['SenseCapSeeedSensor']) -> list[MeasurementResult]:
+        # all measurement ids of one gateway come with the same response, so it is only requested once
+        newest_points = self._get_newest_points()
+        results = []
+        for sensor in sensors:
+            try:
+                result = sensor._read_measurement(newest_points)
+            except ValueError:
+                # a missing measurement id must not cost the other sensors of the gateway their values
+                result = MeasurementResult(value=None)
+            result.sensor_id = str(sensor.sensor_config.id)
+            results.append(result)
+        return results
+
+    def _get_newest_points(self) -> dict:
+        """
+        The newest point per measurement id of the gateway's latest response, shared between all sensors using the same
+        endpoint and credentials for most of their interval, concurrent polls wait for the request in flight.
+        """
+        ttl_seconds = self.sensor_config.intervalSeconds * 0.9
+        return sensecap_points_cache.get(self.get_device_key(), ttl_seconds, lambda: self._index_points(self._fetch_data()))
+
+    def _fetch_data(self) -> dict:
+        response = self.http_session.get(
             self.http_endpoint,
             auth=(self.username, self.password),
             timeout=10
         )
 
         response.raise_for_status()
-        data = response.json()
-
-        sensor_id = self.sensor_id
+        return response.json()
 
+    @staticmethod
+    def _index_points(data: dict) -> dict:
+        """
+        :return: (time, point) of the newest point per measurement id, points without a time count as the oldest
+        """
         points = data.get("data", [{}])[0].get("points", [])
 
-        # Try to get the matching measurement
-        matched_points = [p for p in points if p.get("measurement_id") == sensor_id]
+        # keep the latest measurement in case there are multiple measurements returned per id,
+        # every time is parsed once and reused for the selected point
+        newest_points = {}
+        for point in points:
+            measurement_id = point.get("measurement_id")
+            time = SenseCapSeeedSensor._parse_time(point.get("time"))
+            newest = newest_points.get(measurement_id)
+            if newest is None or (time is not None and (newest[0] is None or time > newest[0])):
+                newest_points[measurement_id] = (time, point)
+        return newest_points
 
-        if not matched_points:
-            raise ValueError(f"No measurement with id {sensor_id} found")
-
-        # Get the latest measurement in case there are multiple measurements returned
-        newest_point = max(
-            matched_points,
-            key=lambda p: datetime.fromisoformat(p["time"].replace("Z", "+00:00"))
-        )
-
-        value = newest_point.get("measurement_value")
+    @staticmethod
+    def _parse_time(value: str) -> datetime or None:
+        if not value:
+            return None
+        try:
+            time = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            time = parse_datetime(value)
+        # the api sends UTC times, naive ones couldn't be compared with the others
+        return time if time.tzinfo is not None else time.replace(tzinfo=timezone.utc)
+
+    def _read_measurement(self, newest_points: dict) -> MeasurementResult:
+        sensor_id = self.sensor_id
 
-        timestamp = None
-        if newest_point.get("time"):
-            timestamp = parse_datetime(newest_point["time"])
+        newest = newest_points.get(sensor_id)
+        if newest is None:
+            raise ValueError(f"No measurement with id {sensor_id} found")
 
-        return MeasurementResult(value=value, timestamp=timestamp)
+        timestamp, newest_point = newest
+        return MeasurementResult(value=newest_point.get("measurement_value"), timestamp=timestamp)
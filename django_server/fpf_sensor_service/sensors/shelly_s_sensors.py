@@ -2,10 +2,11 @@ import json
 from . import MeasurementResult, TypedSensor
 from .http_sensor import HttpSensor
 from .sensor_description import SensorDescription, ConnectionType, FieldDescription, FieldType, ValidHttpEndpointRule
-import requests
 
 
 class ShellySSensor(HttpSensor):
+    value_key = "apower"
+
     @staticmethod
     def get_description() -> SensorDescription:
         return SensorDescription(
@@ -26,11 +27,6 @@ class ShellySSensor(HttpSensor):
             ]
         )
 
-    def get_measurement(self) -> MeasurementResult:
-        response = requests.get(self.http_endpoint, timeout=10)
-        response.raise_for_status()
-        return MeasurementResult(value=response.json().get("apower"))
-
 
 class MQTTShellySSensor(TypedSensor):
     mqtt_topic = None
@@ -1,12 +1,25 @@
+import asyncio
 from abc import ABC, abstractmethod
+from typing import Hashable
+from urllib.parse import urlsplit
+
+import aiohttp
+import requests
 
 from fpf_sensor_service.models import SensorConfig, SensorMeasurement
+from fpf_sensor_service.utils import http_session_manager
+from .measurement_result import MeasurementResult
+from .reporting_filter import ReportingFilter
 from .sensor_description import SensorDescription
 
 
 class TypedSensor(ABC):
-    def __init__(self, sensor_config: SensorConfig):
+    def __init__(self, sensor_config: SensorConfig, http_session: requests.Session = None):
         self.sensor_config = sensor_config
+        # use this session for any http requests so connections to the sensor get reused between polls
+        self.http_session = http_session or http_session_manager.session
+        # readings not worth storing (unchanged within a deadband etc.) are dropped before being buffered
+        self.reporting_filter = ReportingFilter.from_additional_information(sensor_config.additionalInformation)
         self.init_additional_information()
 
     @abstractmethod
@@ -21,3 +34,37 @@ class TypedSensor(ABC):
     @abstractmethod
     def get_measurement(self, payload=None)->SensorMeasurement:
         pass
+
+    def get_device_key(self) -> Hashable or None:
+        """
+        Sensors returning the same key read their values from the same device poll, for example several parameters
+        of one weather station. They are scheduled together and polled once with get_measurements().
+        """
+        return None
+
+    def get_circuit_key(self) -> str or None:
+        """
+        Sensors with the same key share a circuit breaker, by default the host of the sensor's http endpoint.
+        """
+        http_endpoint = getattr(self, 'http_endpoint', None)
+        if not http_endpoint:
+            return None
+        if '://' not in http_endpoint:
+            http_endpoint = f'http://{http_endpoint}'
+        return urlsplit(http_endpoint).netloc
+
+    def get_measurements(self, sensors: list['TypedSensor']) -> list[MeasurementResult]:
+        """
+        Poll the device once and return a measurement result for every given sensor, each with its sensor_id set.
+        All given sensors share this sensor's device key, without a device key it's only ever this sensor itself.
+        """
+        result = self.get_measurement()
+        result.sensor_id = str(self.sensor_config.id)
+        return [result]
+
+    async def get_measurements_async(self, sensors: list['TypedSensor'], http_session: aiohttp.ClientSession) -> list[MeasurementResult]:
+        """
+        Used by the asyncio polling engine, sensors that can poll without blocking override this with the given session.
+        By default the blocking get_measurements() runs in a worker thread so it doesn't hold up the event loop.
+        """
+        return await asyncio.to_thread(self.get_measurements, sensors)
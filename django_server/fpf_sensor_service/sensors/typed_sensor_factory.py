@@ -1,6 +1,9 @@
-from typing import Type
+import threading
+from types import MappingProxyType
+from typing import Mapping, NamedTuple, Type
 
 from fpf_sensor_service.sensors.typed_sensor import TypedSensor, SensorDescription
+from fpf_sensor_service.sensors.sensor_description import ConnectionType
 from fpf_sensor_service.models import SensorConfig
 
 def all_subclasses(cls):
@@ -8,26 +11,85 @@ def all_subclasses(cls):
     return set(cls.__subclasses__()).union(
         [s for c in cls.__subclasses__() for s in all_subclasses(c)])
 
-class TypedSensorFactory:
-    registry = None
 
+class TypedSensorRegistry(NamedTuple):
+    """
+    Read only view of all typed sensor classes and their descriptions, keyed by sensor class id.
+    """
+    classes: Mapping[str, Type[TypedSensor]]
+    descriptions: Mapping[str, SensorDescription]
+    class_ids_by_connection: Mapping[ConnectionType, tuple[str, ...]]
+    class_ids_by_model: Mapping[str, tuple[str, ...]]
+    available_sensor_types: tuple[SensorDescription, ...]
+
+
+_registry: TypedSensorRegistry = None
+_registry_lock = threading.Lock()
+
+
+def get_typed_sensor_registry() -> TypedSensorRegistry:
+    """
+    The sensor classes are discovered once per process on first use, after all sensor modules are imported.
+    """
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = _build_registry()
+    return _registry
+
+
+def _build_registry() -> TypedSensorRegistry:
+    classes = {}
+    descriptions = {}
+    class_ids_by_connection = {}
+    class_ids_by_model = {}
+    for sensor_class in all_subclasses(TypedSensor):
+        description = sensor_class.get_description()
+        if description.sensor_class_id in classes:
+            raise Exception("Multiple typed sensors with the same id detected!!")
+
+        classes[description.sensor_class_id] = sensor_class
+        descriptions[description.sensor_class_id] = description
+        class_ids_by_connection.setdefault(description.connection, []).append(description.sensor_class_id)
+        class_ids_by_model.setdefault(description.model, []).append(description.sensor_class_id)
+
+    return TypedSensorRegistry(
+        classes=MappingProxyType(classes),
+        descriptions=MappingProxyType(descriptions),
+        class_ids_by_connection=MappingProxyType({k: tuple(v) for k, v in class_ids_by_connection.items()}),
+        class_ids_by_model=MappingProxyType({k: tuple(v) for k, v in class_ids_by_model.items()}),
+        available_sensor_types=tuple(descriptions.values()),
+    )
+
+
+class TypedSensorFactory:
+    """
+    Creating a factory is cheap, all instances share the process wide registry.
+    """
     def __init__(self, **kwargs):
-        if self.registry is None:
-            self.registry = {}
-            for sensor_class in all_subclasses(TypedSensor):
-                description = sensor_class.get_description()
-                if description.sensor_class_id in self.registry:
-                    raise Exception("Multiple typed sensors with the same id detected!!")
+        pass
 
-                self.registry[description.sensor_class_id] = sensor_class
+    @property
+    def registry(self) -> Mapping[str, Type[TypedSensor]]:
+        return get_typed_sensor_registry().classes
 
     def get_available_sensor_types(self) -> list[SensorDescription]:
-        return [
-            sensor_class.get_description() for sensor_class in self.registry.values()
-        ]
+        return list(get_typed_sensor_registry().available_sensor_types)
 
     def get_typed_sensor(self, sensor_model: SensorConfig) -> TypedSensor:
         return self.registry[str(sensor_model.sensorClassId)](sensor_model)
 
     def get_typed_sensor_class(self, sensor_class_id: str) -> Type[TypedSensor]:
         return self.registry[sensor_class_id]
+
+    def get_description(self, sensor_class_id: str) -> SensorDescription:
+        return get_typed_sensor_registry().descriptions[sensor_class_id]
+
+    def get_typed_sensor_classes_by_connection(self, connection: ConnectionType) -> list[Type[TypedSensor]]:
+        registry = get_typed_sensor_registry()
+        return [registry.classes[class_id] for class_id in registry.class_ids_by_connection.get(connection, ())]
+
+    def get_typed_sensor_classes_by_model(self, model: str) -> list[Type[TypedSensor]]:
+        registry = get_typed_sensor_registry()
+        return [registry.classes[class_id] for class_id in registry.class_ids_by_model.get(model, ())]
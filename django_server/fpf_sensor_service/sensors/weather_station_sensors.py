@@ -1,14 +1,26 @@
+import hashlib
 import json
 
-import requests
-from typing import Optional
+from typing import Optional, Hashable
 from .measurement_result import MeasurementResult
 from .typed_sensor import TypedSensor
 from .sensor_description import SensorDescription, ConnectionType, FieldDescription, FieldType, ValidHttpEndpointRule
 from dateutil.parser import parse as parse_datetime  # to parse ISO 8601 strings
+from fpf_sensor_service.utils.fetch_cache import SharedFetchCache
 
 
-class HttpWeatherStationAirTemperatureSensor(TypedSensor):
+ttn_uplink_cache = SharedFetchCache()
+
+
+class WeatherStationUplinkSensor:
+    """
+    Shared implementation of all weather station parameters, the sensor classes only differ in their description
+    and the message_type they read from the decoded TTN uplink.
+    Every parameter of a station is read from the same latest uplink, so the response is shared between all sensors
+    using the same endpoint and authorization for most of their interval and sensors ticking at the same time
+    wait for the one request in flight. Sensors of the same station are also polled together via get_measurements().
+    """
+    message_type: str = None
     http_endpoint = None
     auth_header: Optional[dict] = None
 
@@ -21,6 +33,54 @@ class HttpWeatherStationAirTemperatureSensor(TypedSensor):
         else:
             self.auth_header = {}
 
+    def get_device_key(self) -> Hashable:
+        return 'ttn_uplink', self.http_endpoint, tuple(sorted(self.auth_header.items()))
+
+    def get_circuit_key(self) -> str:
+        # the TTN cloud host is shared by many stations, one station with a bad token must not open the circuit for all
+        return 'ttn:' + hashlib.sha1(repr(self.get_device_key()).encode('utf-8')).hexdigest()
+
+    def get_measurement(self) -> MeasurementResult:
+        return self._read_uplink_message(self._get_latest_uplink())
+
+    def get_measurements(self, sensors: list['WeatherStationUplinkSensor']) -> list[MeasurementResult]:
+        json_data = self._get_latest_uplink()
+        results = []
+        for sensor in sensors:
+            result = sensor._read_uplink_message(json_data)
+            result.sensor_id = str(sensor.sensor_config.id)
+            results.append(result)
+        return results
+
+    def _get_latest_uplink(self) -> dict:
+        url = self.http_endpoint + "?limit=1&order=-received_at"
+        ttl_seconds = self.sensor_config.intervalSeconds * 0.9
+
+        def fetch():
+            response = self.http_session.get(url, headers=self.auth_header, timeout=10)
+            response.raise_for_status()
+            return response.json()
+
+        return ttn_uplink_cache.get(self.get_device_key(), ttl_seconds, fetch)
+
+    def _read_uplink_message(self, json_data: dict) -> MeasurementResult:
+        value = None
+        timestamp = None
+
+        for msg in json_data.get("result", {}).get("uplink_message", {}).get("decoded_payload", {}).get("messages", []):
+            if msg["type"] == self.message_type:
+                value = msg["measurementValue"]
+                break
+
+        ttn_timestamp = json_data.get("result", {}).get("uplink_message", {}).get("received_at")
+        if ttn_timestamp:
+            timestamp = parse_datetime(ttn_timestamp)
+        return MeasurementResult(value=value, timestamp=timestamp)
+
+
+class HttpWeatherStationAirTemperatureSensor(WeatherStationUplinkSensor, TypedSensor):
+    message_type = "Air Temperature"
+
     @staticmethod
     def get_description() -> SensorDescription:
         return SensorDescription(
@@ -49,37 +109,8 @@ class HttpWeatherStationAirTemperatureSensor(TypedSensor):
         )
 
 
-    def get_measurement(self) -> MeasurementResult:
-        url = self.http_endpoint + "?limit=1&order=-received_at"
-        response = requests.get(url, headers=self.auth_header)
-        response.raise_for_status()
-        json_data = response.json()
-
-        value = None
-        timestamp = None
-
-        for msg in json_data.get("result", {}).get("uplink_message", {}).get("decoded_payload", {}).get("messages", []):
-            if msg["type"] == "Air Temperature":
-                value = msg["measurementValue"]
-                break
-
-        ttn_timestamp = json_data.get("result", {}).get("uplink_message", {}).get("received_at")
-        if ttn_timestamp:
-            timestamp = parse_datetime(ttn_timestamp)
-        return MeasurementResult(value=value, timestamp=timestamp)
-
-class HttpWeatherStationAirHumiditySensor(TypedSensor):
-    http_endpoint = None
-    auth_header: Optional[dict] = None
-
-    def init_additional_information(self):
-        additional_information = json.loads(self.sensor_config.additionalInformation)
-        self.http_endpoint = additional_information['http']
-        api_key = additional_information.get('authorization')
-        if api_key:
-            self.auth_header = {"Authorization": f"Bearer {api_key}"}
-        else:
-            self.auth_header = {}
+class HttpWeatherStationAirHumiditySensor(WeatherStationUplinkSensor, TypedSensor):
+    message_type = "Air Humidity"
 
     @staticmethod
     def get_description() -> SensorDescription:
@@ -109,37 +140,8 @@ class HttpWeatherStationAirHumiditySensor(TypedSensor):
         )
 
 
-    def get_measurement(self) -> MeasurementResult:
-        url = self.http_endpoint + "?limit=1&order=-received_at"
-        response = requests.get(url, headers=self.auth_header)
-        response.raise_for_status()
-        json_data = response.json()
-
-        value = None
-        timestamp = None
-
-        for msg in json_data.get("result", {}).get("uplink_message", {}).get("decoded_payload", {}).get("messages", []):
-            if msg["type"] == "Air Humidity":
-                value = msg["measurementValue"]
-                break
-
-        ttn_timestamp = json_data.get("result", {}).get("uplink_message", {}).get("received_at")
-        if ttn_timestamp:
-            timestamp = parse_datetime(ttn_timestamp)
-        return MeasurementResult(value=value, timestamp=timestamp)
-
-class HttpWeatherStationLightIntensitySensor(TypedSensor):
-    http_endpoint = None
-    auth_header: Optional[dict] = None
-
-    def init_additional_information(self):
-        additional_information = json.loads(self.sensor_config.additionalInformation)
-        self.http_endpoint = additional_information['http']
-        api_key = additional_information.get('authorization')
-        if api_key:
-            self.auth_header = {"Authorization": f"Bearer {api_key}"}
-        else:
-            self.auth_header = {}
+class HttpWeatherStationLightIntensitySensor(WeatherStationUplinkSensor, TypedSensor):
+    message_type = "Light Intensity"
 
     @staticmethod
     def get_description() -> SensorDescription:
@@ -168,38 +170,9 @@ class HttpWeatherStationLightIntensitySensor(TypedSensor):
             ]
         )
 
-    def get_measurement(self) -> MeasurementResult:
-        url = self.http_endpoint + "?limit=1&order=-received_at"
-        response = requests.get(url, headers=self.auth_header)
-        response.raise_for_status()
-        json_data = response.json()
-
-        value = None
-        timestamp = None
-
-        for msg in json_data.get("result", {}).get("uplink_message", {}).get("decoded_payload", {}).get("messages",
-                                                                                                        []):
-            if msg["type"] == "Light Intensity":
-                value = msg["measurementValue"]
-                break
 
-        ttn_timestamp = json_data.get("result", {}).get("uplink_message", {}).get("received_at")
-        if ttn_timestamp:
-            timestamp = parse_datetime(ttn_timestamp)
-        return MeasurementResult(value=value, timestamp=timestamp)
-
-class HttpWeatherStationUVIndexSensor(TypedSensor):
-    http_endpoint = None
-    auth_header: Optional[dict] = None
-
-    def init_additional_information(self):
-        additional_information = json.loads(self.sensor_config.additionalInformation)
-        self.http_endpoint = additional_information['http']
-        api_key = additional_information.get('authorization')
-        if api_key:
-            self.auth_header = {"Authorization": f"Bearer {api_key}"}
-        else:
-            self.auth_header = {}
+class HttpWeatherStationUVIndexSensor(WeatherStationUplinkSensor, TypedSensor):
+    message_type = "UV Index"
 
     @staticmethod
     def get_description() -> SensorDescription:
@@ -228,38 +201,9 @@ class HttpWeatherStationUVIndexSensor(TypedSensor):
             ]
         )
 
-    def get_measurement(self) -> MeasurementResult:
-        url = self.http_endpoint + "?limit=1&order=-received_at"
-        response = requests.get(url, headers=self.auth_header)
-        response.raise_for_status()
-        json_data = response.json()
 
-        value = None
-        timestamp = None
-
-        for msg in json_data.get("result", {}).get("uplink_message", {}).get("decoded_payload", {}).get("messages",
-                                                                                                        []):
-            if msg["type"] == "UV Index":
-                value = msg["measurementValue"]
-                break
-
-        ttn_timestamp = json_data.get("result", {}).get("uplink_message", {}).get("received_at")
-        if ttn_timestamp:
-            timestamp = parse_datetime(ttn_timestamp)
-        return MeasurementResult(value=value, timestamp=timestamp)
-
-class HttpWeatherStationWindSpeedSensor(TypedSensor):
-    http_endpoint = None
-    auth_header: Optional[dict] = None
-
-    def init_additional_information(self):
-        additional_information = json.loads(self.sensor_config.additionalInformation)
-        self.http_endpoint = additional_information['http']
-        api_key = additional_information.get('authorization')
-        if api_key:
-            self.auth_header = {"Authorization": f"Bearer {api_key}"}
-        else:
-            self.auth_header = {}
+class HttpWeatherStationWindSpeedSensor(WeatherStationUplinkSensor, TypedSensor):
+    message_type = "Wind Speed"
 
     @staticmethod
     def get_description() -> SensorDescription:
@@ -288,38 +232,9 @@ class HttpWeatherStationWindSpeedSensor(TypedSensor):
             ]
         )
 
-    def get_measurement(self) -> MeasurementResult:
-        url = self.http_endpoint + "?limit=1&order=-received_at"
-        response = requests.get(url, headers=self.auth_header)
-        response.raise_for_status()
-        json_data = response.json()
-
-        value = None
-        timestamp = None
-
-        for msg in json_data.get("result", {}).get("uplink_message", {}).get("decoded_payload", {}).get("messages",
-                                                                                                        []):
-            if msg["type"] == "Wind Speed":
-                value = msg["measurementValue"]
-                break
-
-        ttn_timestamp = json_data.get("result", {}).get("uplink_message", {}).get("received_at")
-        if ttn_timestamp:
-            timestamp = parse_datetime(ttn_timestamp)
-        return MeasurementResult(value=value, timestamp=timestamp)
 
-class HttpWeatherStationWindDirectionSensor(TypedSensor):
-    http_endpoint = None
-    auth_header: Optional[dict] = None
-
-    def init_additional_information(self):
-        additional_information = json.loads(self.sensor_config.additionalInformation)
-        self.http_endpoint = additional_information['http']
-        api_key = additional_information.get('authorization')
-        if api_key:
-            self.auth_header = {"Authorization": f"Bearer {api_key}"}
-        else:
-            self.auth_header = {}
+class HttpWeatherStationWindDirectionSensor(WeatherStationUplinkSensor, TypedSensor):
+    message_type = "Wind Direction Sensor"
 
     @staticmethod
     def get_description() -> SensorDescription:
@@ -348,38 +263,9 @@ class HttpWeatherStationWindDirectionSensor(TypedSensor):
             ]
         )
 
-    def get_measurement(self) -> MeasurementResult:
-        url = self.http_endpoint + "?limit=1&order=-received_at"
-        response = requests.get(url, headers=self.auth_header)
-        response.raise_for_status()
-        json_data = response.json()
-
-        value = None
-        timestamp = None
-
-        for msg in json_data.get("result", {}).get("uplink_message", {}).get("decoded_payload", {}).get("messages",
-                                                                                                        []):
-            if msg["type"] == "Wind Direction Sensor":
-                value = msg["measurementValue"]
-                break
-
-        ttn_timestamp = json_data.get("result", {}).get("uplink_message", {}).get("received_at")
-        if ttn_timestamp:
-            timestamp = parse_datetime(ttn_timestamp)
-        return MeasurementResult(value=value, timestamp=timestamp)
-
-class HttpWeatherStationRainGaugeSensor(TypedSensor):
-    http_endpoint = None
-    auth_header: Optional[dict] = None
 
-    def init_additional_information(self):
-        additional_information = json.loads(self.sensor_config.additionalInformation)
-        self.http_endpoint = additional_information['http']
-        api_key = additional_information.get('authorization')
-        if api_key:
-            self.auth_header = {"Authorization": f"Bearer {api_key}"}
-        else:
-            self.auth_header = {}
+class HttpWeatherStationRainGaugeSensor(WeatherStationUplinkSensor, TypedSensor):
+    message_type = "Rain Gauge"
 
     @staticmethod
     def get_description() -> SensorDescription:
@@ -408,38 +294,9 @@ class HttpWeatherStationRainGaugeSensor(TypedSensor):
             ]
         )
 
-    def get_measurement(self) -> MeasurementResult:
-        url = self.http_endpoint + "?limit=1&order=-received_at"
-        response = requests.get(url, headers=self.auth_header)
-        response.raise_for_status()
-        json_data = response.json()
-
-        value = None
-        timestamp = None
-
-        for msg in json_data.get("result", {}).get("uplink_message", {}).get("decoded_payload", {}).get("messages",
-                                                                                                        []):
-            if msg["type"] == "Rain Gauge":
-                value = msg["measurementValue"]
-                break
-
-        ttn_timestamp = json_data.get("result", {}).get("uplink_message", {}).get("received_at")
-        if ttn_timestamp:
-            timestamp = parse_datetime(ttn_timestamp)
-        return MeasurementResult(value=value, timestamp=timestamp)
-
-class HttpWeatherStationBarometricPressureSensor(TypedSensor):
-    http_endpoint = None
-    auth_header: Optional[dict] = None
 
-    def init_additional_information(self):
-        additional_information = json.loads(self.sensor_config.additionalInformation)
-        self.http_endpoint = additional_information['http']
-        api_key = additional_information.get('authorization')
-        if api_key:
-            self.auth_header = {"Authorization": f"Bearer {api_key}"}
-        else:
-            self.auth_header = {}
+class HttpWeatherStationBarometricPressureSensor(WeatherStationUplinkSensor, TypedSensor):
+    message_type = "Barometric Pressure"
 
     @staticmethod
     def get_description() -> SensorDescription:
@@ -467,23 +324,3 @@ class HttpWeatherStationBarometricPressureSensor(TypedSensor):
                 ),
             ]
         )
-
-    def get_measurement(self) -> MeasurementResult:
-        url = self.http_endpoint + "?limit=1&order=-received_at"
-        response = requests.get(url, headers=self.auth_header)
-        response.raise_for_status()
-        json_data = response.json()
-
-        value = None
-        timestamp = None
-
-        for msg in json_data.get("result", {}).get("uplink_message", {}).get("decoded_payload", {}).get("messages",
-                                                                                                        []):
-            if msg["type"] == "Barometric Pressure":
-                value = msg["measurementValue"]
-                break
-
-        ttn_timestamp = json_data.get("result", {}).get("uplink_message", {}).get("received_at")
-        if ttn_timestamp:
-            timestamp = parse_datetime(ttn_timestamp)
-        return MeasurementResult(value=value, timestamp=timestamp)
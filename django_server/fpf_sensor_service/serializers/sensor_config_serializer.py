@@ -44,7 +44,7 @@ class SensorConfigSerializer(serializers.ModelSerializer):
         return value
 
     def validate(self, data):
-        sensor_description = typed_sensor_factory.get_typed_sensor_class(str(data['sensorClassId'])).get_description()
+        sensor_description = typed_sensor_factory.get_description(str(data['sensorClassId']))
         for field in sensor_description.fields:
             additional_information = json.loads(data['additionalInformation'])
             if not field.name in additional_information:
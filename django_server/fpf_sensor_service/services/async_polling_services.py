@@ -0,0 +1,102 @@
+import asyncio
+import threading
+from typing import Awaitable, Callable
+
+import aiohttp
+from django_server import settings
+
+from fpf_sensor_service.utils import get_logger
+
+
+logger = get_logger()
+
+
+class AsyncPollingEngine:
+    """
+    Alternative to the APScheduler thread pool, selected with SENSOR_POLLING_ENGINE='asyncio'.
+    All interval jobs run as tasks on a single event loop in one background thread, so a sensor waiting on the network
+    doesn't hold a worker thread and hundreds of sensors can be polled concurrently.
+    The loop also owns the shared aiohttp session sensors use for non-blocking http requests.
+    """
+    def __init__(self):
+        self.http_session: aiohttp.ClientSession = None
+        self._loop: asyncio.AbstractEventLoop = None
+        self._tasks: dict[str, asyncio.Task] = {}
+        self._job_ids: set[str] = set()
+        self._lock = threading.Lock()
+        self._started = threading.Event()
+
+    def start(self):
+        if self._started.is_set():
+            return
+
+        threading.Thread(target=self._run, daemon=True).start()
+        self._started.wait()
+
+    def stop(self):
+        if self._started.is_set():
+            asyncio.run_coroutine_threadsafe(self._shutdown(), self._loop).result()
+            # only stopped once _shutdown() completed, otherwise its future would never be resolved
+            self._loop.call_soon_threadsafe(self._loop.stop)
+
+    def add_job(self, job_id: str, job: Callable[[], Awaitable], interval_seconds: float, delay_seconds: float = 0):
+        """
+        Run the job every interval_seconds, an existing job with the same id gets replaced.
+        """
+        with self._lock:
+            self._job_ids.add(job_id)
+        self._loop.call_soon_threadsafe(self._add_task, job_id, job, interval_seconds, delay_seconds)
+
+    def remove_job(self, job_id: str):
+        with self._lock:
+            self._job_ids.discard(job_id)
+        self._loop.call_soon_threadsafe(self._cancel_task, job_id)
+
+    def has_job(self, job_id: str) -> bool:
+        with self._lock:
+            return job_id in self._job_ids
+
+    def _run(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        self._loop.run_until_complete(self._open_http_session())
+        self._started.set()
+        try:
+            self._loop.run_forever()
+        finally:
+            self._loop.close()
+
+    async def _open_http_session(self):
+        self.http_session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit_per_host=settings.HTTP_POOL_MAXSIZE),
+            timeout=aiohttp.ClientTimeout(total=settings.SENSOR_POLLING_TIMEOUT_S),
+        )
+
+    async def _shutdown(self):
+        for job_id in list(self._tasks):
+            self._cancel_task(job_id)
+        await self.http_session.close()
+        self._started.clear()
+
+    def _add_task(self, job_id: str, job: Callable[[], Awaitable], interval_seconds: float, delay_seconds: float):
+        self._cancel_task(job_id)
+        self._tasks[job_id] = self._loop.create_task(self._run_job(job_id, job, interval_seconds, delay_seconds))
+
+    def _cancel_task(self, job_id: str):
+        task = self._tasks.pop(job_id, None)
+        if task is not None:
+            task.cancel()
+
+    async def _run_job(self, job_id: str, job: Callable[[], Awaitable], interval_seconds: float, delay_seconds: float):
+        await asyncio.sleep(delay_seconds)
+        while True:
+            started_at = self._loop.time()
+            try:
+                await job()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error running polling job {job_id}: {e}")
+
+            # a run taking longer than the interval delays the next one instead of overlapping with it
+            await asyncio.sleep(max(0.0, interval_seconds - (self._loop.time() - started_at)))
@@ -0,0 +1,83 @@
+import threading
+from typing import Optional
+
+import requests
+
+from django_server import settings
+
+from fpf_sensor_service.models import Configuration, ConfigurationKeys
+from fpf_sensor_service.utils import get_logger, http_session_manager
+
+
+logger = get_logger()
+
+
+class ConfigurationCache:
+    """
+    In memory copy of the Configuration table, the fpf id and api key are read for nearly every log message.
+    Missing keys are cached as None as well, so every write to a Configuration has to invalidate its key.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._values: dict[ConfigurationKeys, Optional[str]] = {}
+        self._generation = 0
+
+    def get(self, key: ConfigurationKeys) -> Optional[str]:
+        with self._lock:
+            if key in self._values:
+                return self._values[key]
+            generation = self._generation
+
+        configuration = Configuration.objects.filter(key=key.value).first()
+        value = configuration.value if configuration else None
+
+        with self._lock:
+            # an invalidation during the query means the value we read might already be outdated
+            if generation == self._generation:
+                self._values[key] = value
+        return value
+
+    def invalidate(self, key: ConfigurationKeys = None):
+        with self._lock:
+            self._generation += 1
+            if key is None:
+                self._values.clear()
+            else:
+                self._values.pop(key, None)
+
+
+configuration_cache = ConfigurationCache()
+
+
+def get_fpf_id() -> str or None:
+    fpf_id = configuration_cache.get(ConfigurationKeys.FPF_ID)
+    if fpf_id is None:
+        logger.debug('!!! FPF ID CONFIGURATION LOST, UNABLE TO PROCEED !!!')
+    return fpf_id
+
+
+def request_api_key() -> str or None:
+    fpf_id = get_fpf_id()
+    if fpf_id is None:
+        return None
+
+    url = f"{settings.MEASUREMENTS_BASE_URL}/api/fpfs/{fpf_id}/api-key"
+    try:
+        response = http_session_manager.session.get(url, timeout=http_session_manager.dashboard_timeout)
+    except requests.RequestException as e:
+        logger.error(f'!!! Request for new API Key failed: {e} !!!')
+        return None
+    # the dashboard backend posts the new key to our api-keys endpoint while answering this request
+    configuration_cache.invalidate(ConfigurationKeys.API_KEY)
+    if response.status_code != 200:
+        logger.error('!!! Request for new API Key failed !!!')
+        return None
+    else:
+        return configuration_cache.get(ConfigurationKeys.API_KEY)
+
+
+def get_or_request_api_key() -> str or None:
+    api_key = configuration_cache.get(ConfigurationKeys.API_KEY)
+    if api_key is None:
+        return request_api_key()
+    return api_key
@@ -0,0 +1,480 @@
+import mmap
+import os
+import re
+import struct
+import threading
+import uuid
+from abc import ABC, abstractmethod
+from collections import Counter
+from contextlib import closing
+from dataclasses import dataclass
+from datetime import datetime, timezone as dt_timezone
+from typing import Hashable, Iterator, Optional
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from django_server import settings
+
+from fpf_sensor_service.models import SensorMeasurement
+
+
+@dataclass
+class BufferedMeasurement:
+    """
+    A measurement waiting to be uploaded, id is assigned by the buffer backend when it's stored.
+    measuredAt defaults to the time it's stored, the orm backend always uses that time (auto_now_add).
+    """
+    sensor_id: str
+    value: float
+    measuredAt: Optional[datetime] = None
+    id: Optional[Hashable] = None
+
+    @property
+    def pk(self):
+        return self.id
+
+
+class MeasurementBuffer(ABC):
+    """
+    Store and forward buffer for measurements until the dashboard backend acknowledged them.
+    Packages returned by iter_packages contain objects with id/pk, measuredAt and value attributes.
+    """
+    @abstractmethod
+    def add_many(self, measurements: list[BufferedMeasurement]):
+        pass
+
+    @abstractmethod
+    def replace_value(self, measurement, value: float):
+        """
+        Change the value of a pending measurement, keeping its id and measuredAt.
+        """
+        pass
+
+    @abstractmethod
+    def sensor_ids(self) -> list[str]:
+        """
+        Ids of all sensors with pending measurements.
+        """
+        pass
+
+    @abstractmethod
+    def iter_packages(self, sensor_id: str, package_size: int) -> Iterator[list]:
+        """
+        Yield the pending measurements of a sensor in packages of up to package_size, oldest first.
+        Acknowledging a yielded package before continuing the iteration is allowed.
+        """
+        pass
+
+    @abstractmethod
+    def acknowledge(self, measurements: list):
+        """
+        Remove exactly the given measurements, measurements stored while they were being sent are kept.
+        """
+        pass
+
+    # approximate disk space of one pending measurement, used to enforce byte limits of the retention policy
+    measurement_size_bytes: int
+
+    @abstractmethod
+    def count(self, sensor_id: str) -> int:
+        pass
+
+    @abstractmethod
+    def drop_older_than(self, sensor_id: str, cutoff: datetime) -> int:
+        """
+        :return: amount of dropped measurements
+        """
+        pass
+
+    @abstractmethod
+    def drop_oldest(self, sensor_id: str, count: int) -> int:
+        """
+        :return: amount of dropped measurements
+        """
+        pass
+
+
+class OrmMeasurementBuffer(MeasurementBuffer):
+    """
+    Default backend keeping the pending measurements as SensorMeasurement rows in the database.
+    """
+    # row with two uuids, timestamp and value plus the (sensor, measuredAt, id) index entry
+    measurement_size_bytes = 160
+
+    def add_many(self, measurements: list[BufferedMeasurement]):
+        # measuredAt is filled in by auto_now_add
+        with transaction.atomic():
+            SensorMeasurement.objects.bulk_create([
+                SensorMeasurement(sensor_id=m.sensor_id, value=m.value) for m in measurements
+            ])
+
+    def replace_value(self, measurement: SensorMeasurement, value: float):
+        SensorMeasurement.objects.filter(pk=measurement.pk).update(value=value)
+
+    def sensor_ids(self) -> list[str]:
+        return [str(sensor_id) for sensor_id in SensorMeasurement.objects.values_list('sensor_id', flat=True).distinct()]
+
+    def iter_packages(self, sensor_id: str, package_size: int) -> Iterator[list[SensorMeasurement]]:
+        # each package is a keyset query continuing after the last (measuredAt, id) of the previous one,
+        # so only one package is held in memory and no OFFSET has to skip over already sent rows
+        queryset = (SensorMeasurement.objects
+                    .filter(sensor_id=sensor_id, measuredAt__isnull=False)
+                    .only('id', 'measuredAt', 'value')
+                    .order_by('measuredAt', 'id'))
+        last = None
+        while True:
+            page = queryset
+            if last is not None:
+                # the redundant measuredAt__gte gives sqlite a start for the index seek, it can't derive one from the OR
+                page = page.filter(
+                    Q(measuredAt__gt=last.measuredAt) | Q(measuredAt=last.measuredAt, id__gt=last.id),
+                    measuredAt__gte=last.measuredAt,
+                )
+
+            measurements = list(page[:package_size])
+            if not measurements:
+                return
+
+            yield measurements
+            if len(measurements) < package_size:
+                return
+            last = measurements[-1]
+
+    def acknowledge(self, measurements: list[SensorMeasurement]):
+        SensorMeasurement.objects.filter(pk__in=[measurement.pk for measurement in measurements]).delete()
+
+    def count(self, sensor_id: str) -> int:
+        return SensorMeasurement.objects.filter(sensor_id=sensor_id).count()
+
+    def drop_older_than(self, sensor_id: str, cutoff: datetime) -> int:
+        deleted, _ = SensorMeasurement.objects.filter(sensor_id=sensor_id, measuredAt__lt=cutoff).delete()
+        return deleted
+
+    def drop_oldest(self, sensor_id: str, count: int) -> int:
+        if count <= 0:
+            return 0
+
+        last = (SensorMeasurement.objects
+                .filter(sensor_id=sensor_id, measuredAt__isnull=False)
+                .only('id', 'measuredAt')
+                .order_by('measuredAt', 'id')[count - 1:count]
+                .first())
+        if last is None:
+            deleted, _ = SensorMeasurement.objects.filter(sensor_id=sensor_id).delete()
+        else:
+            deleted, _ = SensorMeasurement.objects.filter(
+                Q(measuredAt__lt=last.measuredAt) | Q(measuredAt=last.measuredAt, id__lte=last.id),
+                sensor_id=sensor_id,
+                measuredAt__lte=last.measuredAt,
+            ).delete()
+        return deleted
+
+
+class SegmentLogMeasurementBuffer(MeasurementBuffer):
+    """
+    Keeps the pending measurements in append-only segment files instead of database rows.
+    Every measurement is a fixed size record (sensor index, unix timestamp, value), a batch of records is appended
+    with a single fsync and segments are read via mmap. Uploaded records are appended as positions to the ack file
+    of their segment and a segment is deleted as soon as all its records are acknowledged.
+    Sensor ids are mapped to indices by their position in the append-only sensors file.
+    After a crash a partially written record at the end of a file is cut off, records that were uploaded but
+    not acknowledged yet are sent again.
+    """
+    RECORD = struct.Struct('<Idd')
+    VALUE = struct.Struct('<d')
+    VALUE_OFFSET = RECORD.size - VALUE.size
+    ACK_RECORD = struct.Struct('<I')
+    SENSOR_ID_SIZE = 16
+    SEGMENT_FILE = re.compile(r'^segment_(\d+)\.log$')
+    measurement_size_bytes = RECORD.size
+
+    def __init__(self, path: str, segment_records: int):
+        self.path = path
+        self.segment_records = segment_records
+        self._lock = threading.Lock()
+
+        self._sensor_ids: list[str] = []
+        self._sensor_indices: dict[str, int] = {}
+        self._segment_sizes: dict[int, int] = {}
+        self._acked: dict[int, set[int]] = {}
+        self._pending = Counter()
+        self._active_segment = None
+        self._active_file = None
+
+        os.makedirs(self.path, exist_ok=True)
+        self._load()
+
+    def add_many(self, measurements: list[BufferedMeasurement]):
+        now = timezone.now()
+        with self._lock:
+            self._register_sensors({str(m.sensor_id) for m in measurements})
+
+            records = [
+                (self._sensor_indices[str(m.sensor_id)], (m.measuredAt or now).timestamp(), m.value)
+                for m in measurements
+            ]
+
+            # fill the active segment up before starting a new one, with one fsync per touched segment
+            while records:
+                if self._segment_sizes[self._active_segment] >= self.segment_records:
+                    self._open_active_segment(self._active_segment + 1)
+                free = self.segment_records - self._segment_sizes[self._active_segment]
+                chunk, records = records[:free], records[free:]
+                self._append(chunk)
+                for sensor_index, _, _ in chunk:
+                    self._pending[sensor_index] += 1
+
+    def replace_value(self, measurement: BufferedMeasurement, value: float):
+        segment, position = measurement.id
+        with self._lock:
+            if segment not in self._segment_sizes or position in self._acked[segment]:
+                return
+            # records have a fixed size, so the value is overwritten in place and the log order stays the same
+            file = os.open(self._segment_path(segment), os.O_WRONLY)
+            try:
+                os.pwrite(file, self.VALUE.pack(value), position * self.RECORD.size + self.VALUE_OFFSET)
+                os.fsync(file)
+            finally:
+                os.close(file)
+
+    def sensor_ids(self) -> list[str]:
+        with self._lock:
+            return [self._sensor_ids[sensor_index] for sensor_index, count in self._pending.items() if count > 0]
+
+    def iter_packages(self, sensor_id: str, package_size: int) -> Iterator[list[BufferedMeasurement]]:
+        sensor_index = self._sensor_indices.get(str(sensor_id))
+        if sensor_index is None:
+            return
+
+        with self._lock:
+            segments = sorted(self._segment_sizes)
+
+        package = []
+        for segment in segments:
+            position = 0
+            while True:
+                records, position = self._read_segment(segment, sensor_index, position, package_size - len(package))
+                package.extend(records)
+                if len(package) < package_size:
+                    break
+                yield package
+                package = []
+
+        if package:
+            yield package
+
+    def acknowledge(self, measurements: list[BufferedMeasurement]):
+        measurements_by_segment: dict[int, dict[int, BufferedMeasurement]] = {}
+        for measurement in measurements:
+            segment, position = measurement.id
+            measurements_by_segment.setdefault(segment, {})[position] = measurement
+
+        with self._lock:
+            for segment, measurements_by_position in measurements_by_segment.items():
+                acked = self._acked.get(segment)
+                if acked is None:
+                    continue
+                positions = [position for position in measurements_by_position if position not in acked]
+                if not positions:
+                    continue
+
+                with open(self._ack_path(segment), 'ab') as file:
+                    file.write(b''.join(self.ACK_RECORD.pack(position) for position in positions))
+                    file.flush()
+                    os.fsync(file.fileno())
+                acked.update(positions)
+
+                for position in positions:
+                    self._pending[self._sensor_indices[str(measurements_by_position[position].sensor_id)]] -= 1
+                self._delete_segment_if_done(segment)
+
+    def count(self, sensor_id: str) -> int:
+        with self._lock:
+            sensor_index = self._sensor_indices.get(str(sensor_id))
+            return self._pending[sensor_index] if sensor_index is not None else 0
+
+    def drop_older_than(self, sensor_id: str, cutoff: datetime) -> int:
+        dropped = 0
+        for package in self.iter_packages(sensor_id, settings.MEASUREMENT_PACKAGE_SIZE):
+            outdated = [measurement for measurement in package if measurement.measuredAt < cutoff]
+            if outdated:
+                self.acknowledge(outdated)
+                dropped += len(outdated)
+        return dropped
+
+    def drop_oldest(self, sensor_id: str, count: int) -> int:
+        # records are appended in the order they were measured, so the first ones in the log are the oldest
+        dropped = 0
+        for package in self.iter_packages(sensor_id, settings.MEASUREMENT_PACKAGE_SIZE):
+            if dropped >= count:
+                break
+            package = package[:count - dropped]
+            self.acknowledge(package)
+            dropped += len(package)
+        return dropped
+
+    def _load(self):
+        sensors_path = os.path.join(self.path, 'sensors.idx')
+        with open(self._truncate_torn_tail(sensors_path, self.SENSOR_ID_SIZE), 'rb') as file:
+            data = file.read()
+        for offset in range(0, len(data), self.SENSOR_ID_SIZE):
+            sensor_id = str(uuid.UUID(bytes=data[offset:offset + self.SENSOR_ID_SIZE]))
+            self._sensor_indices[sensor_id] = len(self._sensor_ids)
+            self._sensor_ids.append(sensor_id)
+
+        segments = sorted(
+            int(match.group(1)) for match in map(self.SEGMENT_FILE.match, os.listdir(self.path)) if match
+        )
+        for segment in segments:
+            size = os.path.getsize(self._truncate_torn_tail(self._segment_path(segment), self.RECORD.size))
+            self._segment_sizes[segment] = size // self.RECORD.size
+
+            acked = set()
+            ack_path = self._truncate_torn_tail(self._ack_path(segment), self.ACK_RECORD.size)
+            with open(ack_path, 'rb') as file:
+                acked.update(position for (position,) in self.ACK_RECORD.iter_unpack(file.read()))
+            self._acked[segment] = acked
+
+            for position, (sensor_index, _, _) in self._iter_records(segment):
+                if position not in acked:
+                    self._pending[sensor_index] += 1
+
+        self._open_active_segment(segments[-1] if segments else 0)
+        for segment in segments[:-1]:
+            self._delete_segment_if_done(segment)
+
+    def _append(self, records: list[tuple]):
+        segment = self._active_segment
+        data = memoryview(b''.join(self.RECORD.pack(*record) for record in records))
+        try:
+            written = 0
+            while written < len(data):
+                written += self._active_file.write(data[written:])
+            os.fsync(self._active_file.fileno())
+        except OSError:
+            # e.g. a full sd card, cut off the partially written chunk so the following records stay aligned
+            try:
+                os.ftruncate(self._active_file.fileno(), self._segment_sizes[segment] * self.RECORD.size)
+            except OSError:
+                # the end of the segment can't be trusted anymore, continue in a new one
+                self._open_active_segment(segment + 1)
+            raise
+        self._segment_sizes[segment] += len(records)
+
+    def _register_sensors(self, sensor_ids: set[str]):
+        new_sensor_ids = [sensor_id for sensor_id in sensor_ids if sensor_id not in self._sensor_indices]
+        if not new_sensor_ids:
+            return
+
+        # the sensors file has to be durable before any record referencing the new indices
+        with open(os.path.join(self.path, 'sensors.idx'), 'ab') as file:
+            file.write(b''.join(uuid.UUID(sensor_id).bytes for sensor_id in new_sensor_ids))
+            file.flush()
+            os.fsync(file.fileno())
+
+        for sensor_id in new_sensor_ids:
+            self._sensor_indices[sensor_id] = len(self._sensor_ids)
+            self._sensor_ids.append(sensor_id)
+
+    def _open_active_segment(self, segment: int):
+        if self._active_file is not None:
+            self._active_file.close()
+
+        self._active_segment = segment
+        # unbuffered, so bytes of a failed write can't be flushed later on
+        self._active_file = open(self._segment_path(segment), 'ab', buffering=0)
+        self._segment_sizes.setdefault(segment, 0)
+        self._acked.setdefault(segment, set())
+
+    def _delete_segment_if_done(self, segment: int):
+        if segment == self._active_segment or segment not in self._segment_sizes:
+            return
+        if len(self._acked[segment]) < self._segment_sizes[segment]:
+            return
+
+        os.remove(self._segment_path(segment))
+        if os.path.exists(self._ack_path(segment)):
+            os.remove(self._ack_path(segment))
+        del self._segment_sizes[segment]
+        del self._acked[segment]
+
+    def _read_segment(self, segment: int, sensor_index: int, start: int, limit: int) -> tuple[list[BufferedMeasurement], int]:
+        """
+        Read up to limit unacknowledged records of the sensor, starting at the given record position.
+        :return: the measurements and the position to continue reading from
+        """
+        with self._lock:
+            size = self._segment_sizes.get(segment)
+            acked = self._acked.get(segment)
+        if not size or acked is None:
+            return [], start
+
+        measurements = []
+        with closing(self._iter_records(segment, start, size)) as records:
+            for position, (index, timestamp, value) in records:
+                if index == sensor_index and position not in acked:
+                    measurements.append(BufferedMeasurement(
+                        sensor_id=self._sensor_ids[index],
+                        value=value,
+                        measuredAt=datetime.fromtimestamp(timestamp, dt_timezone.utc),
+                        id=(segment, position),
+                    ))
+                    if len(measurements) >= limit:
+                        return measurements, position + 1
+        return measurements, size
+
+    def _iter_records(self, segment: int, start: int = 0, end: int = None) -> Iterator[tuple[int, tuple]]:
+        try:
+            file = open(self._segment_path(segment), 'rb')
+        except FileNotFoundError:
+            return
+
+        with file:
+            size = os.fstat(file.fileno()).st_size // self.RECORD.size
+            end = size if end is None else min(end, size)
+            if start >= end:
+                return
+
+            # records are unpacked straight from the mapping, it's closed again once the reader is done
+            # so a segment deleted after its last acknowledgement isn't kept open
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                for position in range(start, end):
+                    yield position, self.RECORD.unpack_from(mapped, position * self.RECORD.size)
+
+    def _truncate_torn_tail(self, path: str, record_size: int) -> str:
+        with open(path, 'ab') as file:
+            size = file.tell()
+            if size % record_size:
+                file.truncate(size - size % record_size)
+                file.flush()
+                os.fsync(file.fileno())
+        return path
+
+    def _segment_path(self, segment: int) -> str:
+        return os.path.join(self.path, f'segment_{segment:010d}.log')
+
+    def _ack_path(self, segment: int) -> str:
+        return os.path.join(self.path, f'segment_{segment:010d}.ack')
+
+
+_measurement_buffer: MeasurementBuffer = None
+_measurement_buffer_lock = threading.Lock()
+
+
+def get_measurement_buffer() -> MeasurementBuffer:
+    """
+    The buffer backend selected with MEASUREMENT_BUFFER_BACKEND, created on first use
+    so management commands don't open the segment log.
+    """
+    global _measurement_buffer
+    if _measurement_buffer is None:
+        with _measurement_buffer_lock:
+            if _measurement_buffer is None:
+                if settings.MEASUREMENT_BUFFER_BACKEND == 'segment_log':
+                    _measurement_buffer = SegmentLogMeasurementBuffer(
+                        settings.MEASUREMENT_BUFFER_PATH, settings.MEASUREMENT_BUFFER_SEGMENT_RECORDS
+                    )
+                else:
+                    _measurement_buffer = OrmMeasurementBuffer()
+    return _measurement_buffer
@@ -0,0 +1,146 @@
+import json
+import statistics
+from dataclasses import dataclass, replace
+from datetime import datetime, timedelta
+
+from django.utils import timezone
+from django_server import settings
+
+from fpf_sensor_service.models import SensorConfig
+from fpf_sensor_service.services.configuration_services import get_fpf_id
+from fpf_sensor_service.services.measurement_buffer_services import MeasurementBuffer, get_measurement_buffer
+from fpf_sensor_service.utils import get_logger
+
+
+logger = get_logger()
+
+
+@dataclass
+class RetentionPolicy:
+    """
+    Limits for the pending measurements of one sensor, 0 disables a limit.
+    Measurements older than downsample_after_seconds are reduced to their minimum, maximum and mean
+    per bucket of downsample_bucket_seconds.
+    """
+    max_age_seconds: int = 0
+    max_rows: int = 0
+    max_bytes: int = 0
+    downsample_after_seconds: int = 0
+    downsample_bucket_seconds: int = 300
+
+    # keys of the optional "retention" dict in a sensor's additionalInformation
+    OVERRIDE_KEYS = {
+        'maxAgeSeconds': 'max_age_seconds',
+        'maxRows': 'max_rows',
+        'maxBytes': 'max_bytes',
+        'downsampleAfterSeconds': 'downsample_after_seconds',
+        'downsampleBucketSeconds': 'downsample_bucket_seconds',
+    }
+
+    @staticmethod
+    def default() -> 'RetentionPolicy':
+        return RetentionPolicy(
+            max_age_seconds=settings.MEASUREMENT_RETENTION_MAX_AGE_S,
+            max_rows=settings.MEASUREMENT_RETENTION_MAX_ROWS,
+            max_bytes=settings.MEASUREMENT_RETENTION_MAX_BYTES,
+            downsample_after_seconds=settings.MEASUREMENT_DOWNSAMPLE_AFTER_S,
+            downsample_bucket_seconds=settings.MEASUREMENT_DOWNSAMPLE_BUCKET_S,
+        )
+
+    @staticmethod
+    def for_sensor(sensor_config: SensorConfig, default: 'RetentionPolicy') -> 'RetentionPolicy':
+        try:
+            overrides = json.loads(sensor_config.additionalInformation or '{}').get('retention') or {}
+        except (ValueError, AttributeError):
+            return default
+
+        return replace(default, **{
+            field: int(overrides[key]) for key, field in RetentionPolicy.OVERRIDE_KEYS.items() if key in overrides
+        })
+
+    def is_active(self) -> bool:
+        return bool(self.max_age_seconds or self.max_rows or self.max_bytes or self.downsample_after_seconds)
+
+    def get_max_rows(self, measurement_size_bytes: int) -> int:
+        limits = [limit for limit in (self.max_rows, self.max_bytes // measurement_size_bytes if self.max_bytes else 0) if limit]
+        return min(limits) if limits else 0
+
+
+def apply_retention_policies(buffer: MeasurementBuffer = None):
+    """
+    Enforce the retention policy of every sensor with pending measurements,
+    so the backlog of a long dashboard outage stays bounded and is cheaper to upload afterwards.
+    """
+    buffer = buffer or get_measurement_buffer()
+    default = RetentionPolicy.default()
+    sensor_ids = buffer.sensor_ids()
+    sensor_configs = {str(sensor_config.id): sensor_config for sensor_config in SensorConfig.objects.filter(id__in=sensor_ids)}
+
+    for sensor_id in sensor_ids:
+        sensor_config = sensor_configs.get(sensor_id)
+        policy = RetentionPolicy.for_sensor(sensor_config, default) if sensor_config else default
+        if policy.is_active():
+            apply_retention_policy(buffer, sensor_id, policy)
+
+
+def apply_retention_policy(buffer: MeasurementBuffer, sensor_id: str, policy: RetentionPolicy):
+    now = timezone.now()
+    dropped = 0
+
+    if policy.max_age_seconds:
+        dropped += buffer.drop_older_than(sensor_id, now - timedelta(seconds=policy.max_age_seconds))
+
+    downsampled = 0
+    if policy.downsample_after_seconds:
+        downsampled = downsample(buffer, sensor_id, now - timedelta(seconds=policy.downsample_after_seconds),
+                                 policy.downsample_bucket_seconds)
+
+    max_rows = policy.get_max_rows(buffer.measurement_size_bytes)
+    if max_rows:
+        dropped += buffer.drop_oldest(sensor_id, buffer.count(sensor_id) - max_rows)
+
+    if dropped or downsampled:
+        logger.warning(f"Retention policy dropped {dropped} and downsampled {downsampled} pending measurements", extra={
+            'extra': {'fpfId': get_fpf_id(), 'sensorId': sensor_id}})
+
+
+def downsample(buffer: MeasurementBuffer, sensor_id: str, older_than: datetime, bucket_seconds: int) -> int:
+    """
+    Reduce the measurements of every bucket that ended before older_than to its minimum, its maximum and one
+    measurement in between carrying the mean of the bucket. All three keep their original timestamps and ids,
+    the mean is not marked as such, there is no field for it in the buffers or the upload.
+    Buckets with three or less measurements are already as small as they get, so downsampling twice changes nothing.
+    :return: amount of measurements removed
+    """
+    removed = 0
+    bucket_key = None
+    bucket = []
+
+    def reduce_bucket():
+        nonlocal removed
+        if len(bucket) <= 3:
+            return
+
+        minimum = min(bucket, key=lambda m: m.value)
+        maximum = max(bucket, key=lambda m: m.value)
+        others = [m for m in bucket if m is not minimum and m is not maximum]
+        mean = others.pop(len(others) // 2)
+        buffer.replace_value(mean, statistics.fmean(m.value for m in bucket))
+        buffer.acknowledge(others)
+        removed += len(others)
+
+    # only buckets ending before older_than, a bucket is reduced once it is complete
+    last_bucket_key = int(older_than.timestamp() // bucket_seconds) - 1
+    for package in buffer.iter_packages(sensor_id, settings.MEASUREMENT_PACKAGE_SIZE):
+        for measurement in package:
+            key = int(measurement.measuredAt.timestamp() // bucket_seconds)
+            if key > last_bucket_key:
+                continue
+
+            if key != bucket_key:
+                reduce_bucket()
+                bucket_key = key
+                bucket = []
+            bucket.append(measurement)
+    reduce_bucket()
+    return removed
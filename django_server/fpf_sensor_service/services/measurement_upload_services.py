@@ -0,0 +1,68 @@
+import threading
+import time
+
+from django_server import settings
+
+from fpf_sensor_service.services.configuration_services import get_fpf_id
+from fpf_sensor_service.services.measurement_buffer_services import get_measurement_buffer
+from fpf_sensor_service.services.measurement_retention_services import apply_retention_policies
+from fpf_sensor_service.services.scheduler_services import send_measurements, send_all_measurements_batched
+from fpf_sensor_service.utils import get_logger
+
+
+logger = get_logger()
+
+
+class MeasurementUploadService:
+    """
+    The sensor tasks and the MQTT service only store their measurements in the local database,
+    this service drains the buffered measurements to the dashboard backend in its own thread.
+    Every sensor with pending measurements gets its readings sent in packages, so a slow or unreachable
+    dashboard backend never blocks the measurement collection and the local db acts as the persistent queue.
+    """
+    def __init__(self, interval_seconds: int = None):
+        self.interval_seconds = interval_seconds or settings.MEASUREMENT_UPLOAD_INTERVAL_S
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        self._wakeup.set()
+
+    def _run(self):
+        next_retention_at = 0
+        while not self._stopped.is_set():
+            # the retention policy runs before uploading, so a backlog after an outage is already reduced
+            if time.monotonic() >= next_retention_at:
+                next_retention_at = time.monotonic() + settings.MEASUREMENT_RETENTION_INTERVAL_S
+                try:
+                    apply_retention_policies()
+                except Exception as e:
+                    logger.error(f"Error applying measurement retention policy: {e}", extra={'extra': {'fpfId': get_fpf_id()}})
+
+            try:
+                self.upload_pending_measurements()
+            except Exception as e:
+                logger.error(f"Error uploading measurements: {e}", extra={'extra': {'fpfId': get_fpf_id()}})
+
+            self._wakeup.wait(self.interval_seconds)
+            self._wakeup.clear()
+
+    @staticmethod
+    def upload_pending_measurements():
+        if settings.MEASUREMENT_UPLOAD_BATCHED:
+            send_all_measurements_batched()
+            return
+
+        sensor_ids = get_measurement_buffer().sensor_ids()
+        for sensor_id in sensor_ids:
+            send_measurements(sensor_id)
@@ -0,0 +1,69 @@
+import threading
+import time
+
+from django_server import settings
+
+from fpf_sensor_service.services.configuration_services import get_fpf_id
+from fpf_sensor_service.services.measurement_buffer_services import BufferedMeasurement, get_measurement_buffer
+from fpf_sensor_service.utils import get_logger
+
+
+logger = get_logger()
+
+
+class MeasurementBatchWriter:
+    """
+    Collects measurements for a short window and writes them to the measurement buffer at once,
+    so a burst of MQTT messages costs one SQLite transaction (or fsync) instead of one per message.
+    A batch is written once the window since its first measurement is over or max_rows are pending.
+    """
+    def __init__(self, window_ms: int = None, max_rows: int = None):
+        self.window_seconds = (window_ms or settings.MEASUREMENT_WRITE_BATCH_WINDOW_MS) / 1000
+        self.max_rows = max_rows or settings.MEASUREMENT_WRITE_BATCH_MAX_ROWS
+
+        self._pending: list[BufferedMeasurement] = []
+        self._first_added_at = None
+        self._condition = threading.Condition()
+        self._thread = None
+
+    def add(self, measurement: BufferedMeasurement):
+        with self._condition:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+
+            if not self._pending:
+                self._first_added_at = time.monotonic()
+            self._pending.append(measurement)
+
+            if len(self._pending) == 1 or len(self._pending) >= self.max_rows:
+                self._condition.notify()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._pending:
+                    self._condition.wait()
+
+                deadline = self._first_added_at + self.window_seconds
+                while len(self._pending) < self.max_rows:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+
+                batch = self._pending[:self.max_rows]
+                self._pending = self._pending[self.max_rows:]
+                self._first_added_at = time.monotonic()
+
+            self._write(batch)
+
+    @staticmethod
+    def _write(batch: list[BufferedMeasurement]):
+        try:
+            get_measurement_buffer().add_many(batch)
+        except Exception as e:
+            logger.error(f"Error storing {len(batch)} measurements: {e}", extra={'extra': {'fpfId': get_fpf_id()}})
+
+
+measurement_writer = MeasurementBatchWriter()
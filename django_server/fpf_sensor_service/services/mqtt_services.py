@@ -1,47 +1,98 @@
 # fpf_sensor_service/mqtt_service.py
 import paho.mqtt.client as mqtt
+import queue
 import threading
-import time
 import json
 from django.conf import settings
+from django.utils import timezone
 
-from fpf_sensor_service.models import SensorConfig, SensorMeasurement, sensor_config
-from fpf_sensor_service.sensors import typed_sensor_factory
+from fpf_sensor_service.models import SensorConfig
+from fpf_sensor_service.sensors import TypedSensor, TypedSensorFactory
 from fpf_sensor_service.sensors.sensor_description import ConnectionType
-from fpf_sensor_service.services.scheduler_services import send_measurements, get_fpf_id
+from fpf_sensor_service.services.configuration_services import get_fpf_id
+from fpf_sensor_service.services.measurement_buffer_services import BufferedMeasurement
+from fpf_sensor_service.services.measurement_writer_services import measurement_writer
+from fpf_sensor_service.services.mqtt_topic_index import MqttTopicIndex
+from fpf_sensor_service.services.scheduler_services import scheduler
 from fpf_sensor_service.utils import get_logger
-import random
-import time
 
-import requests
-from datetime import timedelta
 
-from django.utils import timezone
-from django_server import settings
-from apscheduler.schedulers.background import BackgroundScheduler
+typed_sensor_factory = TypedSensorFactory()
+topic_index = MqttTopicIndex()
 
-from fpf_sensor_service.models import SensorConfig, SensorMeasurement, Configuration, ConfigurationKeys
-from fpf_sensor_service.sensors import TypedSensor, TypedSensorFactory, MeasurementResult
-from fpf_sensor_service.utils import get_logger
+logger = get_logger()
 
 
-logger = get_logger()
-'''
-daemon=False is required in deployment to run correctly as a systemd service,
-but it does not play nice with running it in the IDE during development. 
-DO NOT OVERRIDE WHEN MERGING INTO DEPLOYMENT! 
-'''
-scheduler = BackgroundScheduler() # daemon=False)
-typed_sensor_factory = TypedSensorFactory()
+def build_mqtt_sensor(sensor_config: SensorConfig) -> tuple[str, TypedSensor] or None:
+    """
+    :return: topic and typed sensor of an active sensor config that receives measurements via MQTT
+    """
+    if not sensor_config.isActive:
+        return None
+
+    sensor_class = typed_sensor_factory.get_typed_sensor_class(str(sensor_config.sensorClassId))
+    # Only with connection type == MQTT
+    if typed_sensor_factory.get_description(str(sensor_config.sensorClassId)).connection not in (ConnectionType.MQTT, ConnectionType.HTTP_MQTT):
+        return None
+
+    try:
+        topic = json.loads(sensor_config.additionalInformation).get("mqtt_topic")
+    except json.JSONDecodeError as e:
+        print(f"[MQTT] Failed to parse additionalInformation for sensor {sensor_config.id}: {e}")
+        return None
+
+    if not topic:
+        print(f"[MQTT] No mqtt_topic found in additionalInformation for sensor {sensor_config.id}")
+        return None
+
+    return topic, sensor_class(sensor_config)
+
+
+def update_mqtt_sensor(sensor_config: SensorConfig):
+    """
+    Keep the topic index and the broker subscriptions up to date after a sensor config was created or changed.
+    """
+    old_topic = topic_index.remove(str(sensor_config.id))
+    mqtt_sensor = build_mqtt_sensor(sensor_config)
+    if mqtt_sensor is not None:
+        topic_index.add(*mqtt_sensor)
+
+    service = MQTTService.running_service
+    if service is None or not service.connected:
+        return
+
+    if mqtt_sensor is not None and mqtt_sensor[0] != old_topic:
+        print(f"[MQTT] Subscribing to {mqtt_sensor[0]}")
+        service.client.subscribe(mqtt_sensor[0])
+    if old_topic is not None and not topic_index.has_topic(old_topic):
+        print(f"[MQTT] Unsubscribing from {old_topic}")
+        service.client.unsubscribe(old_topic)
 
-logger = get_logger()
 
 class MQTTService:
+    """
+    The paho network thread only decodes incoming messages and routes them to their sensors,
+    the parsing and storing happens in a pool of worker threads fed by bounded queues.
+    That way slow processing can never stall the keepalives and get us disconnected from the broker.
+    Every sensor is handled by the same worker, so its readings reach the reporting filter in order.
+    """
+    running_service = None
+
     def __init__(self):
         self.client = mqtt.Client()
         self.connected = False
         #self.client.on_log = self.on_log
 
+        self.workers = settings.MQTT_CONFIG["WORKERS"]
+        self.backpressure = settings.MQTT_CONFIG["BACKPRESSURE"]
+        self.stats_interval = settings.MQTT_CONFIG["STATS_INTERVAL_S"]
+        # QUEUE_SIZE is shared by the queues of all workers
+        queue_size = max(1, settings.MQTT_CONFIG["QUEUE_SIZE"] // self.workers)
+        self.queues = [queue.Queue(maxsize=queue_size) for _ in range(self.workers)]
+        self.received_messages = 0
+        self.dropped_messages = 0
+        self._counter_lock = threading.Lock()
+
         # Optional: enable auth if using user/pass
         if settings.MQTT_CONFIG["USERNAME"] and settings.MQTT_CONFIG["PASSWORD"]:
             self.client.username_pw_set(settings.MQTT_CONFIG["USERNAME"], settings.MQTT_CONFIG["PASSWORD"])
@@ -51,10 +102,27 @@ class MQTTService:
         self.client.on_message = self.on_message
 
     def start(self):
+        MQTTService.running_service = self
+        for messages in self.queues:
+            threading.Thread(target=self._work, args=[messages], daemon=True).start()
+        if self.stats_interval > 0:
+            scheduler.add_job(self.log_stats, trigger='interval', seconds=self.stats_interval, id='mqtt_stats',
+                              replace_existing=True)
+
         # Start in a separate thread
         thread = threading.Thread(target=self._run, daemon=True)
         thread.start()
 
+    @property
+    def queue_depth(self) -> int:
+        return sum(messages.qsize() for messages in self.queues)
+
+    def log_stats(self):
+        with self._counter_lock:
+            received_messages, dropped_messages = self.received_messages, self.dropped_messages
+        logger.info(f"[MQTT] {received_messages} messages received and {dropped_messages} dropped so far, "
+                    f"{self.queue_depth} waiting to be processed.", extra={'extra': {'fpfId': get_fpf_id()}})
+
     def _run(self):
         try:
             self.client.connect(settings.MQTT_CONFIG["HOST"], settings.MQTT_CONFIG["PORT"], keepalive=60)
@@ -63,26 +131,20 @@ class MQTTService:
             print(f"[MQTT] Initial connection error: {e}")
 
     def on_connect(self, client, userdata, flags, rc):
-        self.connected = True
+        # Rebuild the index on every (re)connect, the broker forgets our subscriptions with the session anyway
+        topic_index.clear()
+        for sensor_config in SensorConfig.objects.filter(isActive=True):
+            mqtt_sensor = build_mqtt_sensor(sensor_config)
+            if mqtt_sensor is not None:
+                topic_index.add(*mqtt_sensor)
 
         # Subscribe to sensor topics
-        for sensor in SensorConfig.objects.filter(isActive=True):
-            sensor_class = typed_sensor_factory.get_typed_sensor_class(str(sensor.sensorClassId))
-            curr_sensor = sensor_class(sensor)
-
-            # Only with connection type == MQTT
-            if curr_sensor.get_description().connection == ConnectionType.MQTT or curr_sensor.get_description().connection == ConnectionType.HTTP_MQTT:
-
-                try:
-                    additional_info = json.loads(sensor.additionalInformation)
-                    topic = additional_info.get("mqtt_topic")
-                    if topic:
-                        print(f"[MQTT] Subscribing to {topic}")
-                        client.subscribe(topic)
-                    else:
-                        print(f"[MQTT] No mqtt_topic found in additionalInformation for sensor {sensor.id}")
-                except json.JSONDecodeError as e:
-                    print(f"[MQTT] Failed to parse additionalInformation for sensor {sensor.id}: {e}")
+        topics = topic_index.topics()
+        if topics:
+            print(f"[MQTT] Subscribing to {', '.join(topics)}")
+            client.subscribe([(topic, 0) for topic in topics])
+
+        self.connected = True
 
     def on_disconnect(self, client, userdata, rc):
         self.connected = False
@@ -92,54 +154,92 @@ class MQTTService:
         try:
             payload = json.loads(msg.payload.decode())
             topic = msg.topic
-            # Try to find the sensor config with this topic
-            matching_sensor = None
-            for sensor in SensorConfig.objects.filter(isActive=True):
-                try:
-                    additional_info = json.loads(sensor.additionalInformation)
-                    if additional_info.get("mqtt_topic") == topic:
-                        matching_sensor = sensor
-                        break
-                except json.JSONDecodeError:
-                    continue
-
-            if not matching_sensor:
+
+            matching_sensors = topic_index.match(topic)
+            if not matching_sensors:
                 logger.warning(f"[MQTT] No sensor found for topic {topic}")
                 return
+        except Exception as e:
+            logger.error(f"Error processing MQTT measurement: {e}", extra={
+                'extra': {'fpfId': get_fpf_id()}
+            })
+            return
 
-            # Extract value and timestamp of payload
-            sensor_class = typed_sensor_factory.get_typed_sensor_class(str(matching_sensor.sensorClassId))
-            curr_sensor = sensor_class(matching_sensor)
+        with self._counter_lock:
+            self.received_messages += 1
+        for sensor in matching_sensors:
+            self._enqueue((sensor, topic, payload))
+
+    def get_queue(self, sensor: TypedSensor) -> queue.Queue:
+        return self.queues[hash(str(sensor.sensor_config.id)) % self.workers]
 
-            measurement = curr_sensor.get_measurement(payload)
+    def _enqueue(self, message):
+        messages = self.get_queue(message[0])
+        if self.backpressure == 'block':
+            messages.put(message)
+            return
+
+        while True:
+            try:
+                messages.put_nowait(message)
+                return
+            except queue.Full:
+                if self.backpressure == 'drop_newest':
+                    self._count_dropped_message()
+                    return
+
+            try:
+                messages.get_nowait()
+                messages.task_done()
+                self._count_dropped_message()
+            except queue.Empty:
+                pass
+
+    def _count_dropped_message(self):
+        with self._counter_lock:
+            self.dropped_messages += 1
+            dropped_messages = self.dropped_messages
+
+        if dropped_messages == 1 or dropped_messages % 100 == 0:
+            logger.warning(f"[MQTT] Message queue is full, {dropped_messages} messages dropped so far.", extra={
+                'extra': {'fpfId': get_fpf_id()}
+            })
+
+    def _work(self, messages: queue.Queue):
+        while True:
+            sensor, topic, payload = messages.get()
+            try:
+                self.process_measurement(sensor, topic, payload)
+            finally:
+                messages.task_done()
+
+    @staticmethod
+    def process_measurement(sensor: TypedSensor, topic: str, payload):
+        try:
+            # Extract value and timestamp of payload
+            measurement = sensor.get_measurement(payload)
 
             if measurement.value is None :
                 logger.warning(f"[MQTT] Missing value in payload from {topic}: {payload}")
                 return
 
-            if measurement.timestamp is None:
-                SensorMeasurement.objects.create(
-                    sensor=matching_sensor,
-                    value=measurement.value,
-                )
-            else:
-                SensorMeasurement.objects.create(
-                    sensor=matching_sensor,
-                    value=measurement.value,
-                    measuredAt=measurement.timestamp
-                )
-
-            send_measurements(sensor_id=matching_sensor.id)
-
-            logger.debug("Sensor MQTT measurements sent", extra={
-                'extra': {'fpfId': get_fpf_id(), 'sensorId': matching_sensor.id}
+            if not sensor.reporting_filter.accept(measurement.value, timezone.now().timestamp()):
+                return
+
+            measurement_writer.add(BufferedMeasurement(
+                sensor_id=str(sensor.sensor_config.id),
+                value=measurement.value,
+            ))
+
+            logger.debug("Sensor MQTT measurement queued for storing", extra={
+                'extra': {'fpfId': get_fpf_id(), 'sensorId': sensor.sensor_config.id}
             })
 
         except Exception as e:
             logger.error(f"Error processing MQTT measurement: {e}", extra={
-                'extra': {'fpfId': get_fpf_id()}
+                'extra': {'fpfId': get_fpf_id(), 'sensorId': sensor.sensor_config.id}
             })
 
 
     #def on_log(self, client, userdata, level, buf):
-    #    print(f"[MQTT LOG] {buf}")
\ No newline at end of file
+    #    print(f"[MQTT LOG] {buf}")
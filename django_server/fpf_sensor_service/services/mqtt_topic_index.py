@@ -0,0 +1,112 @@
+import threading
+from typing import Optional
+
+from fpf_sensor_service.sensors import TypedSensor
+
+
+class _TopicNode:
+    def __init__(self):
+        self.children: dict[str, '_TopicNode'] = {}
+        self.sensors: dict[str, TypedSensor] = {}
+
+
+class MqttTopicIndex:
+    """
+    Maps mqtt topics to the prebuilt typed sensors listening on them.
+    Exact topics are a single dict lookup, subscriptions with + or # wildcards are stored in a tree
+    that is walked level by level, so routing a message does not depend on the amount of configured sensors.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._exact: dict[str, dict[str, TypedSensor]] = {}
+        self._wildcards = _TopicNode()
+        self._topic_by_sensor: dict[str, str] = {}
+
+    @staticmethod
+    def is_wildcard(topic: str) -> bool:
+        return '+' in topic or '#' in topic
+
+    def add(self, topic: str, sensor: TypedSensor):
+        sensor_id = str(sensor.sensor_config.id)
+        with self._lock:
+            self._remove(sensor_id)
+            if self.is_wildcard(topic):
+                node = self._wildcards
+                for level in topic.split('/'):
+                    node = node.children.setdefault(level, _TopicNode())
+                node.sensors[sensor_id] = sensor
+            else:
+                self._exact.setdefault(topic, {})[sensor_id] = sensor
+            self._topic_by_sensor[sensor_id] = topic
+
+    def remove(self, sensor_id: str) -> Optional[str]:
+        """
+        :return: the topic the sensor was listening on
+        """
+        with self._lock:
+            return self._remove(sensor_id)
+
+    def clear(self):
+        with self._lock:
+            self._exact = {}
+            self._wildcards = _TopicNode()
+            self._topic_by_sensor = {}
+
+    def topics(self) -> set[str]:
+        with self._lock:
+            return set(self._topic_by_sensor.values())
+
+    def has_topic(self, topic: str) -> bool:
+        with self._lock:
+            return topic in self._topic_by_sensor.values()
+
+    def match(self, topic: str) -> list[TypedSensor]:
+        with self._lock:
+            sensors = list(self._exact.get(topic, {}).values())
+            if self._wildcards.children:
+                levels = topic.split('/')
+                # topics starting with $ are reserved for the broker and never match a leading wildcard
+                self._match_wildcards(self._wildcards, levels, 0, sensors, skip_wildcards=topic.startswith('$'))
+            return sensors
+
+    def _match_wildcards(self, node: _TopicNode, levels: list[str], depth: int, sensors: list, skip_wildcards=False):
+        if not skip_wildcards:
+            multi_level = node.children.get('#')
+            if multi_level is not None:
+                sensors.extend(multi_level.sensors.values())
+
+        if depth == len(levels):
+            sensors.extend(node.sensors.values())
+            return
+
+        child = node.children.get(levels[depth])
+        if child is not None:
+            self._match_wildcards(child, levels, depth + 1, sensors)
+
+        if not skip_wildcards:
+            single_level = node.children.get('+')
+            if single_level is not None:
+                self._match_wildcards(single_level, levels, depth + 1, sensors)
+
+    def _remove(self, sensor_id: str) -> Optional[str]:
+        topic = self._topic_by_sensor.pop(sensor_id, None)
+        if topic is None:
+            return None
+
+        if self.is_wildcard(topic):
+            path = [self._wildcards]
+            for level in topic.split('/'):
+                path.append(path[-1].children[level])
+            path[-1].sensors.pop(sensor_id, None)
+            # prune branches that no longer lead to any sensor
+            for parent, level, node in reversed(list(zip(path, topic.split('/'), path[1:]))):
+                if node.sensors or node.children:
+                    break
+                del parent.children[level]
+        else:
+            sensors = self._exact.get(topic, {})
+            sensors.pop(sensor_id, None)
+            if not sensors:
+                self._exact.pop(topic, None)
+
+        return topic
@@ -1,16 +1,25 @@
+import asyncio
+import collections
+import functools
+import hashlib
 import random
-import time
+import threading
 import requests
 from datetime import timedelta
+from typing import Callable
 
 from django.utils import timezone
 from django_server import settings
 from apscheduler.schedulers.background import BackgroundScheduler
 
-from fpf_sensor_service.models import SensorConfig, SensorMeasurement, Configuration, ConfigurationKeys
+from fpf_sensor_service.models import SensorConfig
 from fpf_sensor_service.sensors import TypedSensor, TypedSensorFactory, MeasurementResult
 from fpf_sensor_service.sensors.sensor_description import ConnectionType
-from fpf_sensor_service.utils import get_logger
+from fpf_sensor_service.services.async_polling_services import AsyncPollingEngine
+from fpf_sensor_service.services.configuration_services import get_fpf_id, request_api_key, get_or_request_api_key
+from fpf_sensor_service.services.measurement_buffer_services import BufferedMeasurement, get_measurement_buffer
+from fpf_sensor_service.utils import get_logger, http_session_manager
+from fpf_sensor_service.utils.circuit_breaker import CircuitBreaker, circuit_breakers
 
 
 logger = get_logger()
@@ -20,54 +29,68 @@ but it does not play nice with running it in the IDE during development.
 DO NOT OVERRIDE WHEN MERGING INTO DEPLOYMENT! 
 '''
 scheduler = BackgroundScheduler() # daemon=False)
+async_polling_engine = AsyncPollingEngine()
 typed_sensor_factory = TypedSensorFactory()
 
+# sensors polled together, keyed by (device key, interval seconds) and then by sensor id
+device_groups: dict[tuple, dict[str, TypedSensor]] = {}
+device_groups_lock = threading.Lock()
 
-def get_fpf_id() -> str or None:
-    fpf_config = Configuration.objects.filter(key=ConfigurationKeys.FPF_ID.value).first()
-    if not fpf_config:
-        logger.debug('!!! FPF ID CONFIGURATION LOST, UNABLE TO PROCEED !!!')
-        return None
-    return fpf_config.value
+retry_counts = collections.Counter()
+retry_counts_lock = threading.Lock()
 
 
-def request_api_key() -> str or None:
-    fpf_id = get_fpf_id()
-    if fpf_id is None:
-        return None
+def serialize_measurements(measurements: list) -> list or dict:
+    """
+    Rows: [{"measuredAt": "<iso timestamp>", "value": 1.0}, ...]
+    Columnar (MEASUREMENT_PAYLOAD_FORMAT='columnar'): {"measuredAt": [<unix timestamp in ms>, ...], "value": [1.0, ...]}
+    """
+    if settings.MEASUREMENT_PAYLOAD_FORMAT == 'columnar':
+        return {
+            'measuredAt': [round(m.measuredAt.timestamp() * 1000) for m in measurements],
+            'value': [m.value for m in measurements],
+        }
+    return [{'measuredAt': m.measuredAt.isoformat(), 'value': m.value} for m in measurements]
 
-    url = f"{settings.MEASUREMENTS_BASE_URL}/api/fpfs/{fpf_id}/api-key"
-    response = requests.get(url)
-    if response.status_code != 200:
-        logger.error('!!! Request for new API Key failed !!!')
-        return None
-    else:
-        api_key = Configuration.objects.filter(key=ConfigurationKeys.API_KEY.value).first()
-        if api_key:
-            return api_key.value
 
+def post_to_dashboard(dashboard_circuit: CircuitBreaker, url: str, data, api_key: str) -> requests.Response or None:
+    """
+    POST to the dashboard backend and report the outcome to its circuit breaker.
+    :return: the response or None if the dashboard backend was unreachable
+    """
+    try:
+        response = http_session_manager.post_json(url, data, timeout=http_session_manager.dashboard_timeout, headers={
+            'Authorization': f'ApiKey {api_key}'
+        })
+    except requests.RequestException as e:
+        dashboard_circuit.record_failure()
+        logger.error(f'Dashboard backend unreachable, will retry later: {e}',
+                     extra={'extra': {'fpfId': get_fpf_id(), 'api_key': api_key}})
+        return None
 
-def get_or_request_api_key() -> str or None:
-    api_key = Configuration.objects.filter(key=ConfigurationKeys.API_KEY.value).first()
-    if not api_key:
-        return request_api_key()
-    return api_key.value
+    if response.status_code >= 500:
+        dashboard_circuit.record_failure()
+    else:
+        dashboard_circuit.record_success()
+    return response
 
 
 def send_package(sensor_id, measurements, recurse_on_forbidden=True):
+    # skip right away while the dashboard backend is known to be down, the measurements stay queued locally
+    dashboard_circuit = circuit_breakers.get(settings.MEASUREMENTS_BASE_URL)
+    if not dashboard_circuit.allow_request():
+        return False
+
     api_key = get_or_request_api_key()
     if api_key is not None:
-        data = [
-            {'measuredAt': m.measuredAt.isoformat(), 'value': m.value}
-            for m in measurements
-        ]
+        data = serialize_measurements(measurements)
 
-        response = requests.post(f"{settings.MEASUREMENTS_BASE_URL}/api/measurements/{sensor_id}", json=data, headers={
-            'Authorization': f'ApiKey {api_key}'
-        })
+        response = post_to_dashboard(dashboard_circuit, f"{settings.MEASUREMENTS_BASE_URL}/api/measurements/{sensor_id}", data, api_key)
+        if response is None:
+            return False
 
         if response.status_code == 201:
-            SensorMeasurement.objects.filter(measuredAt__lte=measurements[-1].measuredAt).delete()
+            get_measurement_buffer().acknowledge(measurements)
             logger.debug('Successfully sent measurements.',
                          extra={'extra': {'fpfId': get_fpf_id(), 'sensorId': sensor_id, 'api_key': api_key}})
             return True
@@ -82,67 +105,382 @@ def send_package(sensor_id, measurements, recurse_on_forbidden=True):
         return False
 
 
+def send_batch(packages: dict, recurse_on_forbidden=True) -> set:
+    """
+    Send the measurements of multiple sensors in a single request.
+    The dashboard backend answers with a status per sensor id e.g. {"<sensorId>": 201},
+    only the measurements of sensors it accepted get deleted locally.
+    :param packages: measurements to send keyed by sensor id
+    :return: ids of the sensors whose measurements were accepted
+    """
+    dashboard_circuit = circuit_breakers.get(settings.MEASUREMENTS_BASE_URL)
+    if not dashboard_circuit.allow_request():
+        return set()
+
+    api_key = get_or_request_api_key()
+    if api_key is None:
+        return set()
+
+    data = {
+        sensor_id: serialize_measurements(measurements)
+        for sensor_id, measurements in packages.items()
+    }
+
+    response = post_to_dashboard(dashboard_circuit, f"{settings.MEASUREMENTS_BASE_URL}/api/measurements", data, api_key)
+    if response is None:
+        return set()
+
+    if response.status_code in (200, 201, 207):
+        acknowledgements = response.json()
+        accepted = set()
+        for sensor_id, measurements in packages.items():
+            if acknowledgements.get(sensor_id) in (200, 201):
+                get_measurement_buffer().acknowledge(measurements)
+                accepted.add(sensor_id)
+            else:
+                logger.error('Error sending measurements, will retry later.',
+                             extra={'extra': {'fpfId': get_fpf_id(), 'sensorId': sensor_id, 'api_key': api_key}})
+
+        logger.debug(f'Successfully sent measurements of {len(accepted)} sensors.',
+                     extra={'extra': {'fpfId': get_fpf_id(), 'api_key': api_key}})
+        return accepted
+    elif response.status_code == 403:
+        request_api_key()
+        if recurse_on_forbidden:
+            return send_batch(packages, recurse_on_forbidden=False)
+    else:
+        logger.error('Error sending measurement batch, will retry later.',
+                     extra={'extra': {'fpfId': get_fpf_id(), 'api_key': api_key}})
+
+    return set()
+
+
+def send_all_measurements_batched():
+    """
+    Send the pending measurements of all sensors with one request per package round.
+    Sensors only take part in the next round if their last package was accepted and full.
+    """
+    package_size = settings.MEASUREMENT_PACKAGE_SIZE
+    sensor_ids = get_measurement_buffer().sensor_ids()
+    while sensor_ids:
+        packages = {}
+        for sensor_id in sensor_ids:
+            measurements = next(get_measurement_buffer().iter_packages(sensor_id, package_size), None)
+            if measurements:
+                packages[sensor_id] = measurements
+
+        if not packages:
+            break
+
+        accepted = send_batch(packages)
+        sensor_ids = [
+            sensor_id for sensor_id, measurements in packages.items()
+            if sensor_id in accepted and len(measurements) == package_size
+        ]
+
+
 def send_measurements(sensor_id):
     """
     For given sensor, try to send all measurements to central app.
     If succeeded, delete entries from local database.
     :param sensor_id: GUID of sensor
     """
-    measurements = SensorMeasurement.objects.filter(sensor_id=sensor_id).order_by('measuredAt').all()
-    package_size = settings.MEASUREMENT_PACKAGE_SIZE
-    if measurements.exists():
-        packages = (len(measurements) // package_size) + 1
-        for i in range(packages):
-            if not send_package(sensor_id, measurements[i * package_size: (i + 1) * package_size]):
-                break
+    for measurements in get_measurement_buffer().iter_packages(sensor_id, settings.MEASUREMENT_PACKAGE_SIZE):
+        if not send_package(sensor_id, measurements):
+            break
 
 
-def task(sensor: TypedSensor):
+def task(sensor: TypedSensor, attempt: int = 1):
     """
-    Function to trigger the measurement of the sensor and to send existing measurements.
+    Function to trigger the measurement of the sensor and to store it locally,
+    uploading is left to the MeasurementUploadService.
     Gets called at the configured interval for the sensor.
     :param sensor: Sensor of which values are to be processed.
+    :param attempt: Number of this attempt, starting at 1.
+    """
+    delay = measure_sensors([sensor], attempt)
+    if delay is not None:
+        schedule_retry(f"sensor_{sensor.sensor_config.id}", task, [sensor, attempt + 1], delay)
+
+
+def device_task(group_key: tuple, attempt: int = 1):
+    """
+    Same as task() but for all sensors sharing a device, the device gets polled once for all of them.
+    The sensors are looked up on every attempt, so a retry doesn't poll sensors that were changed in the meantime.
+    :param group_key: key of the device group in device_groups
+    :param attempt: Number of this attempt, starting at 1.
+    """
+    sensors = get_device_group_sensors(group_key)
+    if not sensors:
+        return
+    delay = measure_sensors(sensors, attempt)
+    if delay is not None:
+        schedule_retry(get_device_group_job_id(group_key), device_task, [group_key, attempt + 1], delay)
+
+
+def measure_sensors(sensors: list[TypedSensor], attempt: int = 1) -> float or None:
     """
+    Measure the given sensors with a single poll of the first one and store the results.
+    A failed poll is not retried in place, instead the caller schedules a one-shot job for the next attempt
+    so a flaky sensor doesn't occupy a scheduler thread while waiting.
+    :param sensors: Sensors sharing the same device key or a single sensor.
+    :param attempt: Number of this attempt, starting at 1.
+    :return: delay in seconds before the next attempt or None if there is nothing to retry
+    """
+    sensor = sensors[0]
     logger.debug("Sensor task triggered", extra={'extra': {'fpfId': get_fpf_id(), 'sensorId': sensor.sensor_config.id, 'api_key': get_or_request_api_key()}})
     try:
         if settings.GENERATE_MEASUREMENTS:
-            result = MeasurementResult(value=random.uniform(20.0, 20.5))
+            results = generate_measurement_results(sensors)
+        else:
+            sensor_circuit = get_sensor_circuit_breaker(sensor)
+            if sensor_circuit is not None and not sensor_circuit.allow_request():
+                log_sensor_circuit_open(sensors)
+                return None
+
+            try:
+                results = sensor.get_measurements(sensors)
+                if sensor_circuit is not None:
+                    sensor_circuit.record_success()
+            except Exception as e:
+                if sensor_circuit is not None:
+                    sensor_circuit.record(e)
+                # only raise the error outwards if it's the last attempt
+                if attempt >= settings.MEASUREMENT_RETRY_COUNT:
+                    raise e
+                return count_retry(sensors, attempt, e)
+
+        store_measurement_results(sensors, results)
+    except Exception as e:
+        log_sensor_error(sensors, e)
+    return None
+
+
+def schedule_retry(job_id: str, func: Callable, args: list, delay: float):
+    """
+    Schedule the next attempt of a polling job as a one-shot job, it gets removed together with the polling job.
+    """
+    scheduler.add_job(
+        func,
+        trigger='date',
+        run_date=timezone.now() + timedelta(seconds=delay),
+        args=args,
+        id=get_retry_job_id(job_id),
+        replace_existing=True,
+    )
+
+
+def get_retry_job_id(job_id: str) -> str:
+    return f"retry_{job_id}"
+
+
+def get_retry_delay(attempt: int) -> float:
+    """
+    Exponential backoff with jitter, so sensors failing together (e.g. after a network outage) don't retry in lockstep.
+    """
+    delay = min(settings.MEASUREMENT_RETRY_SLEEP_BETWEEN_S * 2 ** (attempt - 1), settings.MEASUREMENT_RETRY_MAX_SLEEP_S)
+    return delay * random.uniform(0.5, 1.0)
+
+
+def count_retry(sensors: list[TypedSensor], attempt: int, e: Exception) -> float:
+    """
+    Count the retry for every sensor of the poll and log it.
+    :return: delay in seconds before the retry
+    """
+    delay = get_retry_delay(attempt)
+    with retry_counts_lock:
+        for s in sensors:
+            retry_counts[str(s.sensor_config.id)] += 1
+
+    for s in sensors:
+        logger.debug(f"Sensor measurement attempt {attempt} failed, retrying in {delay:.1f}s: {e}", extra={
+            'extra': {'fpfId': get_fpf_id(), 'sensorId': s.sensor_config.id, 'api_key': get_or_request_api_key()}})
+    return delay
+
+
+def get_retry_counts() -> dict[str, int]:
+    """
+    :return: amount of retries per sensor id since the start, the highest are the flakiest sensors
+    """
+    with retry_counts_lock:
+        return dict(retry_counts.most_common())
+
+
+def log_retry_summary():
+    """
+    Log the retries per sensor since the start, so flaky sensors show up without enabling debug logging.
+    """
+    for sensor_id, count in get_retry_counts().items():
+        logger.info(f"Sensor measurement retried {count} times since the start", extra={
+            'extra': {'fpfId': get_fpf_id(), 'sensorId': sensor_id, 'api_key': get_or_request_api_key()}})
+
+
+async def measure_sensors_async(get_sensors: Callable[[], list[TypedSensor]]):
+    """
+    measure_sensors() for the asyncio polling engine, the poll itself runs on the event loop with a timeout
+    while the database access is handed to a worker thread. Waiting for a retry doesn't block anything here.
+    :param get_sensors: returns the sensors to measure, empty if the job has nothing to do anymore
+    """
+    sensors = get_sensors()
+    if not sensors:
+        return
+
+    sensor = sensors[0]
+    try:
+        if settings.GENERATE_MEASUREMENTS:
+            results = generate_measurement_results(sensors)
         else:
-            i = 0
-            while i < settings.MEASUREMENT_RETRY_COUNT:
-                i += 1
+            sensor_circuit = get_sensor_circuit_breaker(sensor)
+            attempt = 0
+            while True:
+                attempt += 1
+                if sensor_circuit is not None and not sensor_circuit.allow_request():
+                    await asyncio.to_thread(log_sensor_circuit_open, sensors)
+                    return
+
                 try:
-                    result = sensor.get_measurement()
+                    results = await asyncio.wait_for(
+                        sensor.get_measurements_async(sensors, async_polling_engine.http_session),
+                        timeout=settings.SENSOR_POLLING_TIMEOUT_S
+                    )
+                    if sensor_circuit is not None:
+                        sensor_circuit.record_success()
                     break
                 except Exception as e:
-                    print(f'attempt {i}')
+                    if sensor_circuit is not None:
+                        sensor_circuit.record(e)
                     # only raise the error outwards if it's the last attempt
-                    if i == settings.MEASUREMENT_RETRY_COUNT:
+                    if attempt >= settings.MEASUREMENT_RETRY_COUNT:
                         raise e
-                    else:
-                        time.sleep(settings.MEASUREMENT_RETRY_SLEEP_BETWEEN_S)
+                    delay = await asyncio.to_thread(count_retry, sensors, attempt, e)
+                    await asyncio.sleep(delay)
+
+        await asyncio.to_thread(store_measurement_results, sensors, results)
+    except Exception as e:
+        await asyncio.to_thread(log_sensor_error, sensors, e)
+
+
+def get_sensor_circuit_breaker(sensor: TypedSensor) -> CircuitBreaker or None:
+    circuit_key = sensor.get_circuit_key()
+    if circuit_key is None:
+        return None
+    return circuit_breakers.get(f'sensor:{circuit_key}')
 
+
+def log_sensor_circuit_open(sensors: list[TypedSensor]):
+    for sensor in sensors:
+        logger.debug("Sensor Task skipped as its host keeps failing", extra={
+            'extra': {'fpfId': get_fpf_id(), 'sensorId': sensor.sensor_config.id, 'api_key': get_or_request_api_key()}})
+
+
+def generate_measurement_results(sensors: list[TypedSensor]) -> list[MeasurementResult]:
+    return [
+        MeasurementResult(value=random.uniform(20.0, 20.5), sensor_id=str(s.sensor_config.id))
+        for s in sensors
+    ]
+
+
+def store_measurement_results(sensors: list[TypedSensor], results: list[MeasurementResult]):
+    sensors_by_id = {str(sensor.sensor_config.id): sensor for sensor in sensors}
+    measurements = []
+    for result in results:
+        sensor_id = str(result.sensor_id or sensors[0].sensor_config.id)
         if result.value is not None:
-            SensorMeasurement.objects.create(
-                sensor_id=sensor.sensor_config.id,
-                value=result.value,
-                measuredAt=result.timestamp
-            )
-            send_measurements(sensor.sensor_config.id)
-            logger.debug("Sensor Task completed", extra={'extra': {'fpfId': get_fpf_id(), 'sensorId': sensor.sensor_config.id, 'api_key': get_or_request_api_key()}})
+            if not sensors_by_id.get(sensor_id, sensors[0]).reporting_filter.accept(result.value, timezone.now().timestamp()):
+                logger.debug("Sensor Task measurement suppressed by reporting filter", extra={'extra': {'fpfId': get_fpf_id(), 'sensorId': sensor_id, 'api_key': get_or_request_api_key()}})
+                continue
+            measurements.append(BufferedMeasurement(sensor_id=sensor_id, value=result.value))
         else:
             logger.warning("Sensor Task skipped as value is None", extra={
-                'extra': {'fpfId': get_fpf_id(), 'sensorId': sensor.sensor_config.id,
+                'extra': {'fpfId': get_fpf_id(), 'sensorId': sensor_id,
                           'api_key': get_or_request_api_key()}})
-    except Exception as e:
+
+    if measurements:
+        get_measurement_buffer().add_many(measurements)
+    for measurement in measurements:
+        logger.debug("Sensor Task completed", extra={'extra': {'fpfId': get_fpf_id(), 'sensorId': measurement.sensor_id, 'api_key': get_or_request_api_key()}})
+
+
+def log_sensor_error(sensors: list[TypedSensor], e: Exception):
+    for sensor in sensors:
         logger.error(f"Error processing sensor: {e}", extra={'extra': {'fpfId': get_fpf_id(), 'sensorId': sensor.sensor_config.id, 'api_key': get_or_request_api_key()}})
 
 
+def add_polling_job(job_id: str, interval_seconds: int, instances: int, i: int, sensor: TypedSensor = None, group_key: tuple = None):
+    """
+    Schedule the measurement of a single sensor or a device group with the configured polling engine.
+    """
+    if settings.SENSOR_POLLING_ENGINE == 'asyncio':
+        if sensor is not None:
+            get_sensors = lambda: [sensor]
+        else:
+            get_sensors = functools.partial(get_device_group_sensors, group_key)
+        async_polling_engine.add_job(job_id, functools.partial(measure_sensors_async, get_sensors), interval_seconds, i)
+    else:
+        scheduler.add_job(
+            task if sensor is not None else device_task,
+            trigger='interval',
+            seconds=interval_seconds,
+            args=[sensor if sensor is not None else group_key],
+            id=job_id,
+            next_run_time=timezone.now() + timedelta(seconds=i),
+            max_instances=instances+1  # "for this job" reads like this wouldn't help but let's try anyway
+        )
+
+
+def remove_polling_job(job_id: str):
+    if settings.SENSOR_POLLING_ENGINE == 'asyncio':
+        async_polling_engine.remove_job(job_id)
+    else:
+        # a pending retry would otherwise still poll the old sensor configuration
+        for scheduled_job_id in (job_id, get_retry_job_id(job_id)):
+            if scheduler.get_job(scheduled_job_id):
+                scheduler.remove_job(scheduled_job_id)
+
+
+def has_polling_job(job_id: str) -> bool:
+    if settings.SENSOR_POLLING_ENGINE == 'asyncio':
+        return async_polling_engine.has_job(job_id)
+    return scheduler.get_job(job_id) is not None
+
+
+def get_device_group_job_id(group_key: tuple) -> str:
+    return f"device_{hashlib.sha1(repr(group_key).encode()).hexdigest()}"
+
+
+def get_device_group_sensors(group_key: tuple) -> list[TypedSensor]:
+    with device_groups_lock:
+        return list(device_groups.get(group_key, {}).values())
+
+
+def remove_from_device_group(sensor_id: str) -> tuple or None:
+    """
+    :return: key of the device group the sensor was removed from
+    """
+    with device_groups_lock:
+        for group_key, sensors in device_groups.items():
+            if sensor_id in sensors:
+                del sensors[sensor_id]
+                if not sensors:
+                    del device_groups[group_key]
+                return group_key
+    return None
+
+
+def schedule_device_group(group_key: tuple, instances: int, i: int):
+    job_id = get_device_group_job_id(group_key)
+    if not get_device_group_sensors(group_key):
+        remove_polling_job(job_id)
+    elif not has_polling_job(job_id):
+        add_polling_job(job_id, group_key[1], instances, i, group_key=group_key)
+
+
 def reschedule_task(sensor_config: SensorConfig, instances: int):
-    job_id = f"sensor_{sensor_config.id}"
-    job = scheduler.get_job(job_id)
-    if job:
-        scheduler.remove_job(job_id)
+    remove_polling_job(f"sensor_{sensor_config.id}")
+
+    group_key = remove_from_device_group(str(sensor_config.id))
+    if group_key is not None:
+        schedule_device_group(group_key, instances, 1)
 
     if sensor_config.isActive:
         add_scheduler_task(sensor_config, instances, 1)
@@ -153,22 +491,28 @@ def add_scheduler_task(sensor_config: SensorConfig, instances: int, i: int):
     sensor = sensor_class(sensor_config)
 
     # Don't add MQTT sensor tasks to the scheduler
-    if sensor.get_description().connection != ConnectionType.MQTT:
-        scheduler.add_job(
-            task,
-            trigger='interval',
-            seconds=sensor_config.intervalSeconds,
-            args=[sensor],
-            id=f"sensor_{sensor_config.id}",
-            next_run_time=timezone.now() + timedelta(seconds=i),
-            max_instances=instances+1  # "for this job" reads like this wouldn't help but let's try anyway
-        )
+    if typed_sensor_factory.get_description(str(sensor_config.sensorClassId)).connection == ConnectionType.MQTT:
+        return
+
+    device_key = sensor.get_device_key()
+    if device_key is not None:
+        # sensors of the same device share one job per interval, sensors with other intervals get their own group
+        group_key = (device_key, sensor_config.intervalSeconds)
+        with device_groups_lock:
+            device_groups.setdefault(group_key, {})[str(sensor_config.id)] = sensor
+        schedule_device_group(group_key, instances, i)
+        return
+
+    add_polling_job(f"sensor_{sensor_config.id}", sensor_config.intervalSeconds, instances, i, sensor=sensor)
 
 
 def start_scheduler():
     """
     Get all sensor configurations from sqlite db and schedule jobs based on set intervals.
     """
+    if settings.SENSOR_POLLING_ENGINE == 'asyncio':
+        async_polling_engine.start()
+
     sensors = SensorConfig.objects.all()
     instances = len(sensors)
     logger.debug(f"Following sensors are configured: {sensors}", extra={'extra': {'fpfId': get_fpf_id(), 'api_key': get_or_request_api_key()}})
@@ -183,6 +527,10 @@ def start_scheduler():
             logger.debug(f"Skipped scheduling task", extra={
                 'extra': {'fpfId': get_fpf_id(), 'sensorId': sensor.id, 'api_key': get_or_request_api_key()}})
 
+    if settings.MEASUREMENT_RETRY_SUMMARY_INTERVAL_S > 0:
+        scheduler.add_job(log_retry_summary, trigger='interval', seconds=settings.MEASUREMENT_RETRY_SUMMARY_INTERVAL_S,
+                          id='retry_summary')
+
     scheduler.start()
 
 
@@ -191,4 +539,5 @@ def stop_scheduler():
     Stop the scheduler
     """
     scheduler.shutdown()
+    async_polling_engine.stop()
     logger.debug("APScheduler shutdown", extra={'extra': {'fpfId': get_fpf_id(), 'api_key': get_or_request_api_key()}})
@@ -1,5 +1,6 @@
 from fpf_sensor_service.services import add_scheduler_task
 from fpf_sensor_service.services.scheduler_services import scheduler, reschedule_task
+from fpf_sensor_service.services.mqtt_services import update_mqtt_sensor
 from fpf_sensor_service.utils.logging_utils import get_logger
 from fpf_sensor_service.models.sensor_config import SensorConfig
 from fpf_sensor_service.serializers.sensor_config_serializer import SensorConfigSerializer
@@ -22,6 +23,7 @@ def create_sensor_config(data) -> SensorConfigSerializer:
 
         instances = len(SensorConfig.objects.all())
         add_scheduler_task(sensor_config, instances, 1)
+        update_mqtt_sensor(sensor_config)
 
         return SensorConfigSerializer(sensor_config)
 
@@ -39,5 +41,6 @@ def update_sensor_config(data, sensor_id) -> SensorConfigSerializer:
         instances = len(SensorConfig.objects.all())
         sensor_config = serializer.save()
         reschedule_task(sensor_config, instances)
+        update_mqtt_sensor(sensor_config)
 
     return serializer
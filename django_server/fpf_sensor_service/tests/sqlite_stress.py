@@ -0,0 +1,87 @@
+import threading
+import time
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.db.utils import ConnectionHandler, OperationalError
+
+
+@dataclass
+class StressResult:
+    written: int
+    reads: int
+    lock_errors: int
+    seconds: float
+
+    @property
+    def writes_per_second(self) -> float:
+        return self.written / self.seconds
+
+
+def run_sqlite_stress(path: str, writers: int, rows_per_writer: int, readers: int, options: dict = None) -> StressResult:
+    """
+    Parallel writers insert rows in one transaction each while readers keep querying the table, all through their own
+    connection to the database file at path, configured like the default database or with the given OPTIONS.
+    Lock errors are counted instead of retried, so they show up as missing rows.
+    """
+    database = {**settings.DATABASES['default'], 'NAME': path}
+    if options is not None:
+        database['OPTIONS'] = options
+    connections = ConnectionHandler({'default': database})
+
+    with connections['default'].cursor() as cursor:
+        cursor.execute('CREATE TABLE IF NOT EXISTS stress (id INTEGER PRIMARY KEY, writer INTEGER, value REAL)')
+    connections['default'].close()
+
+    lock = threading.Lock()
+    counts = {'written': 0, 'reads': 0, 'lock_errors': 0}
+    writers_done = threading.Event()
+
+    def count(key: str):
+        with lock:
+            counts[key] += 1
+
+    def write(writer: int):
+        connection = connections['default']
+        connection.set_autocommit(False)
+        try:
+            for i in range(rows_per_writer):
+                try:
+                    with connection.cursor() as cursor:
+                        cursor.execute('INSERT INTO stress (writer, value) VALUES (%s, %s)', [writer, float(i)])
+                    connection.commit()
+                    count('written')
+                except OperationalError:
+                    connection.rollback()
+                    count('lock_errors')
+        finally:
+            connection.close()
+
+    def read():
+        connection = connections['default']
+        try:
+            while not writers_done.is_set():
+                try:
+                    with connection.cursor() as cursor:
+                        cursor.execute('SELECT COUNT(*), MAX(value) FROM stress')
+                        cursor.fetchone()
+                    count('reads')
+                except OperationalError:
+                    count('lock_errors')
+        finally:
+            connection.close()
+
+    writer_threads = [threading.Thread(target=write, args=(i,)) for i in range(writers)]
+    reader_threads = [threading.Thread(target=read) for _ in range(readers)]
+    start = time.perf_counter()
+    for thread in reader_threads + writer_threads:
+        thread.start()
+    for thread in writer_threads:
+        thread.join()
+    seconds = time.perf_counter() - start
+    writers_done.set()
+    for thread in reader_threads:
+        thread.join()
+
+    return StressResult(seconds=seconds, **counts)
+
@@ -0,0 +1,69 @@
+import logging
+
+from django.test import SimpleTestCase
+
+from django_server.custom_loggers import APILogHandler
+from fpf_sensor_service.tests.utils import StubDashboard
+
+
+class APILogHandlerTest(SimpleTestCase):
+    def log(self, dashboard_url: str, records: list[tuple[str, dict]], batched=False) -> APILogHandler:
+        """
+        Send the (message, extra) records through a handler posting to the dashboard, closing it flushes the queue.
+        """
+        handler = APILogHandler(f'{dashboard_url}/api/log-messages', 'fpf-id', batch_size=10, flush_interval=60, batched=batched)
+        logger = logging.Logger('api_log_handler_test')
+        logger.addHandler(handler)
+        for message, extra in records:
+            logger.error(message, extra={'extra': extra})
+        handler.close()
+        return handler
+
+    def test_records_are_posted_one_by_one(self):
+        with StubDashboard(lambda request: (201, None)) as dashboard:
+            handler = self.log(dashboard.url, [
+                ('first', {'api_key': 'key-1', 'sensorId': 'sensor-1'}),
+                ('second', {'api_key': 'key-2'}),
+                ('not relayed without api key', {}),
+            ])
+
+        self.assertEqual(handler.failed_records, 0)
+        bodies = {request.headers['Authorization']: request.body for request in dashboard.requests}
+        self.assertEqual(len(dashboard.requests), 2)
+        self.assertEqual((bodies['ApiKey key-1']['message'], bodies['ApiKey key-1']['sensorId']), ('first', 'sensor-1'))
+        self.assertEqual((bodies['ApiKey key-2']['message'], bodies['ApiKey key-2']['fpfId']), ('second', 'fpf-id'))
+
+    def test_batched_records_are_posted_as_list_per_api_key(self):
+        with StubDashboard(lambda request: (201, None)) as dashboard:
+            handler = self.log(dashboard.url, [
+                ('first', {'api_key': 'key-1', 'sensorId': 'sensor-1'}),
+                ('second', {'api_key': 'key-2'}),
+                ('third', {'api_key': 'key-1'}),
+                ('not relayed without api key', {}),
+            ], batched=True)
+
+        self.assertEqual(handler.failed_records, 0)
+        bodies = {request.headers['Authorization']: request.body for request in dashboard.requests}
+        self.assertEqual([payload['message'] for payload in bodies['ApiKey key-1']], ['first', 'third'])
+        self.assertEqual([payload['message'] for payload in bodies['ApiKey key-2']], ['second'])
+        self.assertEqual(bodies['ApiKey key-1'][0]['sensorId'], 'sensor-1')
+        self.assertEqual(bodies['ApiKey key-2'][0]['fpfId'], 'fpf-id')
+
+    def test_rejected_records_are_counted_as_failed(self):
+        with StubDashboard(lambda request: (403 if request.headers['Authorization'] == 'ApiKey old' else 201, None)) as dashboard:
+            handler = self.log(dashboard.url, [
+                ('first', {'api_key': 'old'}),
+                ('second', {'api_key': 'old'}),
+                ('third', {'api_key': 'new'}),
+            ], batched=True)
+
+        self.assertEqual(len(dashboard.requests), 2)
+        self.assertEqual(handler.failed_records, 2)
+
+    def test_unreachable_dashboard_counts_records_as_failed(self):
+        # nothing listens on the port of a stopped stand-in anymore
+        with StubDashboard() as dashboard:
+            pass
+        handler = self.log(dashboard.url, [('first', {'api_key': 'key'})])
+
+        self.assertEqual(handler.failed_records, 1)
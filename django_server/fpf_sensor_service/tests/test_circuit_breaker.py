@@ -0,0 +1,29 @@
+from django.test import SimpleTestCase
+
+from fpf_sensor_service.utils.circuit_breaker import CircuitBreaker, CircuitState
+
+
+class CircuitBreakerTest(SimpleTestCase):
+    def test_opening_and_closing_is_logged_once(self):
+        circuit = CircuitBreaker(failure_threshold=2, reset_timeout_seconds=0, key='sensor:10.0.0.5')
+
+        with self.assertLogs('fpf_sensor_service', level='INFO') as logs:
+            circuit.record_failure()
+            circuit.record_failure()
+            self.assertTrue(circuit.allow_request())
+            circuit.record_failure()
+            self.assertTrue(circuit.allow_request())
+            circuit.record_success()
+
+        self.assertEqual(circuit.state, CircuitState.CLOSED)
+        self.assertEqual([record.getMessage() for record in logs.records], [
+            'Circuit breaker for sensor:10.0.0.5 opened after 2 failures, skipping requests for 0s',
+            'Circuit breaker for sensor:10.0.0.5 closed, the target is reachable again',
+        ])
+
+    def test_success_of_closed_circuit_is_not_logged(self):
+        circuit = CircuitBreaker(failure_threshold=2, reset_timeout_seconds=60, key='dashboard')
+
+        with self.assertNoLogs('fpf_sensor_service', level='INFO'):
+            circuit.record_failure()
+            circuit.record_success()
@@ -0,0 +1,69 @@
+import threading
+import time
+from itertools import count
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from fpf_sensor_service.utils.fetch_cache import SharedFetchCache
+
+
+class SharedFetchCacheTest(SimpleTestCase):
+    def setUp(self):
+        self.cache = SharedFetchCache()
+        self.fetches = count(1)
+        self.now = 1000.0
+        # only the clock of the cache module is replaced, not the one of time itself
+        patch = mock.patch('fpf_sensor_service.utils.fetch_cache.time', mock.Mock(monotonic=lambda: self.now))
+        patch.start()
+        self.addCleanup(patch.stop)
+
+    def fetch(self):
+        return next(self.fetches)
+
+    def test_result_is_shared_within_the_ttl(self):
+        self.assertEqual(self.cache.get('station', 60, self.fetch), 1)
+        self.now += 59
+        self.assertEqual(self.cache.get('station', 60, self.fetch), 1)
+        self.now += 1
+        self.assertEqual(self.cache.get('station', 60, self.fetch), 2)
+
+    def test_every_caller_checks_its_own_ttl(self):
+        # a rain gauge polled every hour and a thermometer polled every minute of the same station
+        self.assertEqual(self.cache.get('station', 3240, self.fetch), 1)
+        self.now += 0.2
+        self.assertEqual(self.cache.get('station', 0.1, self.fetch), 2)
+        self.now += 0.05
+        self.assertEqual(self.cache.get('station', 0.1, self.fetch), 2)
+        self.now += 60
+        self.assertEqual(self.cache.get('station', 3240, self.fetch), 2)
+
+    def test_failed_fetch_is_not_cached(self):
+        def fail():
+            raise ValueError('unreachable')
+
+        with self.assertRaises(ValueError):
+            self.cache.get('station', 60, fail)
+        self.assertEqual(self.cache.get('station', 60, self.fetch), 1)
+
+    def test_concurrent_callers_share_the_fetch_in_flight(self):
+        started = threading.Event()
+        release = threading.Event()
+
+        def slow_fetch():
+            started.set()
+            release.wait(5)
+            return self.fetch()
+
+        results = []
+        owner = threading.Thread(target=lambda: results.append(self.cache.get('station', 60, slow_fetch)))
+        owner.start()
+        started.wait(5)
+        waiter = threading.Thread(target=lambda: results.append(self.cache.get('station', 60, self.fetch)))
+        waiter.start()
+        time.sleep(0.05)
+        release.set()
+        owner.join()
+        waiter.join()
+
+        self.assertEqual(results, [1, 1])
@@ -0,0 +1,53 @@
+import asyncio
+import json
+import uuid
+from unittest import mock
+
+import aiohttp
+from django.test import SimpleTestCase
+
+from fpf_sensor_service.models import SensorConfig
+from fpf_sensor_service.sensors import MeasurementResult
+from fpf_sensor_service.sensors.http_sensor import HttpSensor
+from fpf_sensor_service.sensors.shelly_s_sensors import ShellySSensor
+from fpf_sensor_service.tests.utils import StubDashboard
+
+
+class HttpSensorAsyncTest(SimpleTestCase):
+    def poll(self, sensor_class, url: str):
+        sensor = sensor_class(SensorConfig(
+            id=uuid.uuid4(), intervalSeconds=60, sensorClassId=uuid.uuid4(),
+            additionalInformation=json.dumps({'http': url}),
+        ))
+
+        async def get_measurements_async():
+            async with aiohttp.ClientSession() as http_session:
+                return await sensor.get_measurements_async([sensor], http_session)
+
+        results = asyncio.run(get_measurements_async())
+        self.assertEqual([result.sensor_id for result in results], [str(sensor.sensor_config.id)])
+        return results[0]
+
+    def test_value_is_read_from_the_json_response(self):
+        with StubDashboard(lambda request: (200, {'value': 1.5})) as device:
+            result = self.poll(HttpSensor, f'{device.url}/measurement')
+
+        self.assertEqual(result.value, 1.5)
+        self.assertEqual([request.method for request in device.requests], ['GET'])
+
+    def test_value_key_of_subclasses_is_used(self):
+        with StubDashboard(lambda request: (200, {'apower': 12.5, 'value': 1.5})) as device:
+            result = self.poll(ShellySSensor, f'{device.url}/rpc/Switch.GetStatus?id=0')
+
+        self.assertEqual(result.value, 12.5)
+
+    def test_overridden_get_measurement_is_used(self):
+        def get_measurement(sensor) -> MeasurementResult:
+            response = sensor.http_session.get(sensor.http_endpoint, timeout=10)
+            return MeasurementResult(value=response.json()['reading']['value'] * 10)
+
+        with StubDashboard(lambda request: (200, {'reading': {'value': 1.5}})) as device:
+            with mock.patch.object(ShellySSensor, 'get_measurement', get_measurement):
+                result = self.poll(ShellySSensor, f'{device.url}/measurement')
+
+        self.assertEqual(result.value, 15.0)
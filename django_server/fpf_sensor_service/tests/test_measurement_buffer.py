@@ -0,0 +1,195 @@
+import os
+import shutil
+import tempfile
+import uuid
+from datetime import timedelta
+from unittest import mock
+
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+
+from fpf_sensor_service.models import SensorConfig, SensorMeasurement
+from fpf_sensor_service.services.measurement_buffer_services import BufferedMeasurement, OrmMeasurementBuffer, \
+    SegmentLogMeasurementBuffer
+
+
+class FailingFile:
+    """
+    Stands in for a segment file on a full disk, writes part of the data before failing.
+    """
+    def __init__(self, file, written_bytes: int):
+        self.file = file
+        self.written_bytes = written_bytes
+
+    def write(self, data):
+        self.file.write(bytes(data[:self.written_bytes]))
+        raise OSError(28, 'No space left on device')
+
+    def fileno(self):
+        return self.file.fileno()
+
+
+class SegmentLogMeasurementBufferTest(SimpleTestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.path)
+        self.sensor_id = str(uuid.uuid4())
+        self.start = timezone.now().replace(microsecond=0)
+
+    def buffer(self, segment_records=4) -> SegmentLogMeasurementBuffer:
+        return SegmentLogMeasurementBuffer(self.path, segment_records)
+
+    def measurements(self, values, sensor_id=None) -> list[BufferedMeasurement]:
+        return [
+            BufferedMeasurement(sensor_id=sensor_id or self.sensor_id, value=value,
+                                measuredAt=self.start + timedelta(seconds=value))
+            for value in values
+        ]
+
+    def pending_values(self, buffer, sensor_id=None) -> list[float]:
+        return [m.value for package in buffer.iter_packages(sensor_id or self.sensor_id, 100) for m in package]
+
+    def test_reload_keeps_pending_measurements(self):
+        self.buffer().add_many(self.measurements([1, 2, 3, 4, 5, 6]))
+
+        buffer = self.buffer()
+        self.assertEqual(buffer.count(self.sensor_id), 6)
+        self.assertEqual(buffer.sensor_ids(), [self.sensor_id])
+        measurements = [m for package in buffer.iter_packages(self.sensor_id, 4) for m in package]
+        self.assertEqual([m.value for m in measurements], [1, 2, 3, 4, 5, 6])
+        self.assertEqual(measurements[0].measuredAt, self.start + timedelta(seconds=1))
+
+    def test_packages_only_contain_their_sensor(self):
+        other_sensor_id = str(uuid.uuid4())
+        buffer = self.buffer()
+        buffer.add_many(self.measurements([1, 2]) + self.measurements([10, 20], other_sensor_id) + self.measurements([3]))
+
+        self.assertEqual(self.pending_values(buffer), [1, 2, 3])
+        self.assertEqual(self.pending_values(buffer, other_sensor_id), [10, 20])
+
+    def test_acknowledged_measurements_are_not_sent_again_after_reload(self):
+        buffer = self.buffer()
+        buffer.add_many(self.measurements([1, 2, 3]))
+        sent = next(buffer.iter_packages(self.sensor_id, 2))
+        buffer.acknowledge(sent)
+
+        buffer = self.buffer()
+        self.assertEqual(buffer.count(self.sensor_id), 1)
+        self.assertEqual(self.pending_values(buffer), [3])
+
+    def test_sent_but_unacknowledged_measurements_are_sent_again_after_reload(self):
+        buffer = self.buffer()
+        buffer.add_many(self.measurements([1, 2, 3]))
+        next(buffer.iter_packages(self.sensor_id, 2))
+
+        self.assertEqual(self.pending_values(self.buffer()), [1, 2, 3])
+
+    def test_torn_tails_are_cut_off_on_reload(self):
+        buffer = self.buffer()
+        buffer.add_many(self.measurements([1, 2, 3]))
+        buffer.acknowledge(next(buffer.iter_packages(self.sensor_id, 1)))
+
+        # simulate a crash in the middle of writing a record to each file
+        for path, record_size in [
+            (buffer._segment_path(0), buffer.RECORD.size),
+            (buffer._ack_path(0), buffer.ACK_RECORD.size),
+            (os.path.join(self.path, 'sensors.idx'), buffer.SENSOR_ID_SIZE),
+        ]:
+            with open(path, 'ab') as file:
+                file.write(b'\xff' * (record_size - 1))
+
+        buffer = self.buffer()
+        self.assertEqual(os.path.getsize(buffer._segment_path(0)), 3 * buffer.RECORD.size)
+        self.assertEqual(buffer.sensor_ids(), [self.sensor_id])
+        self.assertEqual(self.pending_values(buffer), [2, 3])
+
+        buffer.add_many(self.measurements([4]))
+        self.assertEqual(self.pending_values(self.buffer()), [2, 3, 4])
+
+    def test_fully_acknowledged_segments_are_deleted(self):
+        buffer = self.buffer(segment_records=2)
+        buffer.add_many(self.measurements([1, 2, 3, 4, 5]))
+        self.assertEqual(sorted(buffer._segment_sizes), [0, 1, 2])
+
+        for package in buffer.iter_packages(self.sensor_id, 2):
+            buffer.acknowledge(package)
+
+        # the active segment is kept for the next measurements
+        self.assertFalse(os.path.exists(buffer._segment_path(0)))
+        self.assertFalse(os.path.exists(buffer._segment_path(1)))
+        self.assertTrue(os.path.exists(buffer._segment_path(2)))
+        self.assertEqual(buffer.count(self.sensor_id), 0)
+        self.assertEqual(self.buffer().sensor_ids(), [])
+
+    def test_failed_append_is_rolled_back(self):
+        buffer = self.buffer(segment_records=10)
+        buffer.add_many(self.measurements([1, 2]))
+
+        active_file = buffer._active_file
+        buffer._active_file = FailingFile(active_file, buffer.RECORD.size + 7)
+        with self.assertRaises(OSError):
+            buffer.add_many(self.measurements([3, 4]))
+        buffer._active_file = active_file
+
+        self.assertEqual(buffer.count(self.sensor_id), 2)
+        self.assertEqual(os.path.getsize(buffer._segment_path(0)), 2 * buffer.RECORD.size)
+
+        buffer.add_many(self.measurements([5]))
+        self.assertEqual(self.pending_values(buffer), [1, 2, 5])
+        self.assertEqual(self.pending_values(self.buffer(segment_records=10)), [1, 2, 5])
+
+    def test_replace_value_keeps_the_record_in_place(self):
+        buffer = self.buffer(segment_records=2)
+        buffer.add_many(self.measurements([1, 2, 3]))
+        second, third = [m for package in buffer.iter_packages(self.sensor_id, 100) for m in package][1:]
+
+        buffer.replace_value(second, 2.5)
+        buffer.acknowledge([third])
+        buffer.replace_value(third, 3.5)
+
+        measurements = [m for package in self.buffer(segment_records=2).iter_packages(self.sensor_id, 100) for m in package]
+        self.assertEqual([m.value for m in measurements], [1, 2.5])
+        self.assertEqual(measurements[1].measuredAt, second.measuredAt)
+
+    def test_drop_oldest_and_older_than(self):
+        buffer = self.buffer()
+        buffer.add_many(self.measurements([1, 2, 3, 4, 5, 6]))
+
+        self.assertEqual(buffer.drop_oldest(self.sensor_id, 2), 2)
+        self.assertEqual(buffer.drop_older_than(self.sensor_id, self.start + timedelta(seconds=5)), 2)
+        self.assertEqual(self.pending_values(self.buffer()), [5, 6])
+
+
+class OrmMeasurementBufferTest(TestCase):
+    def setUp(self):
+        self.sensor = SensorConfig.objects.create(id=uuid.uuid4(), intervalSeconds=60, sensorClassId=uuid.uuid4())
+        self.buffer = OrmMeasurementBuffer()
+
+    def test_acknowledge_keeps_measurements_stored_while_sending(self):
+        self.buffer.add_many([BufferedMeasurement(sensor_id=self.sensor.id, value=value) for value in [1, 2]])
+        sent = next(self.buffer.iter_packages(self.sensor.id, 10))
+        self.buffer.add_many([BufferedMeasurement(sensor_id=self.sensor.id, value=3)])
+
+        self.buffer.acknowledge(sent)
+        self.assertEqual(list(SensorMeasurement.objects.values_list('value', flat=True)), [3])
+
+    def test_measured_at_is_the_time_of_storing(self):
+        now = timezone.now()
+        stored_at = [now - timedelta(seconds=value) for value in [1, 2, 3, 4, 5]]
+        with mock.patch('django.utils.timezone.now', side_effect=stored_at):
+            self.buffer.add_many([
+                BufferedMeasurement(sensor_id=self.sensor.id, value=value, measuredAt=now) for value in [1, 2, 3, 4, 5]
+            ])
+
+        packages = list(self.buffer.iter_packages(self.sensor.id, 2))
+        self.assertEqual([[m.value for m in package] for package in packages], [[5, 4], [3, 2], [1]])
+        self.assertEqual(packages[-1][0].measuredAt, stored_at[0])
+
+    def test_replace_value(self):
+        self.buffer.add_many([BufferedMeasurement(sensor_id=self.sensor.id, value=value) for value in [1, 2]])
+        first, second = next(self.buffer.iter_packages(self.sensor.id, 10))
+
+        self.buffer.replace_value(first, 1.5)
+        replaced = SensorMeasurement.objects.get(pk=first.pk)
+        self.assertEqual((replaced.value, replaced.measuredAt), (1.5, first.measuredAt))
+        self.assertEqual(SensorMeasurement.objects.get(pk=second.pk).value, 2)
@@ -0,0 +1,84 @@
+import shutil
+import statistics
+import tempfile
+import uuid
+from datetime import datetime, timedelta, timezone
+from unittest import mock
+
+from django.test import TestCase
+
+from fpf_sensor_service.models import SensorConfig
+from fpf_sensor_service.services.measurement_buffer_services import BufferedMeasurement, OrmMeasurementBuffer, \
+    SegmentLogMeasurementBuffer
+from fpf_sensor_service.services.measurement_retention_services import downsample
+
+
+class DownsampleTest(TestCase):
+    # one 300s bucket, in storing order
+    values = [5, 1, 9, 3, 4, 7, 2, 8]
+
+    def setUp(self):
+        self.sensor = SensorConfig.objects.create(id=uuid.uuid4(), intervalSeconds=30, sensorClassId=uuid.uuid4())
+        self.sensor_id = str(self.sensor.id)
+        self.start = datetime(2025, 1, 1, 12, 0, tzinfo=timezone.utc)
+        self.stored_at = [self.start + timedelta(seconds=30 * i) for i in range(len(self.values))]
+
+        path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, path)
+        self.buffers = {'orm': OrmMeasurementBuffer(), 'segment_log': SegmentLogMeasurementBuffer(path, 100)}
+
+    def fill(self, buffer):
+        # the orm backend always stores the time of storing
+        with mock.patch('django.utils.timezone.now', side_effect=self.stored_at):
+            buffer.add_many([
+                BufferedMeasurement(sensor_id=self.sensor_id, value=value, measuredAt=measured_at)
+                for value, measured_at in zip(self.values, self.stored_at)
+            ])
+
+    def pending(self, buffer) -> list[tuple[datetime, float]]:
+        return [(m.measuredAt, m.value) for package in buffer.iter_packages(self.sensor_id, 100) for m in package]
+
+    def test_bucket_is_reduced_to_min_mean_and_max_with_their_timestamps(self):
+        for name, buffer in self.buffers.items():
+            with self.subTest(name):
+                self.fill(buffer)
+
+                removed = downsample(buffer, self.sensor_id, self.start + timedelta(hours=1), 300)
+
+                self.assertEqual(removed, len(self.values) - 3)
+                # besides min and max the middle one of the others carries the mean
+                self.assertEqual(self.pending(buffer), [
+                    (self.stored_at[1], 1),
+                    (self.stored_at[2], 9),
+                    (self.stored_at[5], statistics.fmean(self.values)),
+                ])
+
+    def test_mean_is_stored_in_place_of_a_kept_reading(self):
+        buffer = self.buffers['orm']
+        self.fill(buffer)
+        middle_id = list(buffer.iter_packages(self.sensor_id, 100))[0][5].id
+
+        downsample(buffer, self.sensor_id, self.start + timedelta(hours=1), 300)
+
+        # the mean row is the original row of that reading, only its value changed
+        mean = list(buffer.iter_packages(self.sensor_id, 100))[0][2]
+        self.assertEqual((mean.id, mean.measuredAt), (middle_id, self.stored_at[5]))
+        self.assertNotEqual(mean.value, self.values[5])
+
+    def test_downsampling_twice_changes_nothing(self):
+        for name, buffer in self.buffers.items():
+            with self.subTest(name):
+                self.fill(buffer)
+                downsample(buffer, self.sensor_id, self.start + timedelta(hours=1), 300)
+                pending = self.pending(buffer)
+
+                self.assertEqual(downsample(buffer, self.sensor_id, self.start + timedelta(hours=1), 300), 0)
+                self.assertEqual(self.pending(buffer), pending)
+
+    def test_buckets_ending_after_older_than_are_kept(self):
+        for name, buffer in self.buffers.items():
+            with self.subTest(name):
+                self.fill(buffer)
+
+                self.assertEqual(downsample(buffer, self.sensor_id, self.start + timedelta(seconds=299), 300), 0)
+                self.assertEqual(len(self.pending(buffer)), len(self.values))
@@ -0,0 +1,154 @@
+import uuid
+from datetime import timedelta
+from unittest import mock
+
+from django.test import TestCase
+from django.utils import timezone
+
+from fpf_sensor_service.models import Configuration, ConfigurationKeys, SensorConfig, SensorMeasurement
+from fpf_sensor_service.services import measurement_buffer_services
+from fpf_sensor_service.services.configuration_services import configuration_cache
+from fpf_sensor_service.services.measurement_buffer_services import BufferedMeasurement, OrmMeasurementBuffer
+from fpf_sensor_service.services.scheduler_services import send_all_measurements_batched, send_measurements
+from fpf_sensor_service.tests.utils import StubDashboard, fpf_settings
+from fpf_sensor_service.utils import http_session_manager
+
+
+class MeasurementUploadTestCase(TestCase):
+    """
+    Uploads measurements from the orm buffer to a StubDashboard.
+    """
+    def setUp(self):
+        Configuration.objects.create(key=ConfigurationKeys.API_KEY.value, value='test-api-key')
+        Configuration.objects.create(key=ConfigurationKeys.FPF_ID.value, value=str(uuid.uuid4()))
+        configuration_cache.invalidate()
+        self.addCleanup(configuration_cache.invalidate)
+
+        self.buffer = OrmMeasurementBuffer()
+        for patch in [
+            mock.patch.object(measurement_buffer_services, '_measurement_buffer', self.buffer),
+            # the content encoding falls back for the whole process after a 415, start each test fresh
+            mock.patch.object(http_session_manager, '_json_body_encoder', None),
+        ]:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+        self.sensors = [
+            SensorConfig.objects.create(id=uuid.uuid4(), intervalSeconds=60, sensorClassId=uuid.uuid4())
+            for _ in range(2)
+        ]
+        self.start = timezone.now().replace(microsecond=0)
+
+    def add_measurements(self, sensor: SensorConfig, values: list[float]):
+        # measuredAt is filled in by auto_now_add, each value is stored as measured value seconds after start
+        with mock.patch('django.utils.timezone.now', side_effect=[self.start + timedelta(seconds=v) for v in values]):
+            self.buffer.add_many([BufferedMeasurement(sensor_id=sensor.id, value=value) for value in values])
+
+    def pending_values(self, sensor: SensorConfig) -> list[float]:
+        return list(SensorMeasurement.objects.filter(sensor=sensor).order_by('measuredAt').values_list('value', flat=True))
+
+    def upload(self, dashboard: StubDashboard, send=send_all_measurements_batched, **settings):
+        with fpf_settings(MEASUREMENTS_BASE_URL=dashboard.url, **settings):
+            send()
+
+
+class BatchedUploadTest(MeasurementUploadTestCase):
+    def test_only_accepted_sensors_are_acknowledged(self):
+        accepted, rejected = self.sensors
+        self.add_measurements(accepted, [1, 2])
+        self.add_measurements(rejected, [3])
+
+        with StubDashboard(lambda request: (207, {str(accepted.id): 201, str(rejected.id): 500})) as dashboard:
+            self.upload(dashboard)
+
+        self.assertEqual(len(dashboard.requests), 1)
+        request = dashboard.requests[0]
+        self.assertEqual(request.path, '/api/measurements')
+        self.assertEqual(request.headers['Authorization'], 'ApiKey test-api-key')
+        self.assertEqual(request.body, {
+            str(accepted.id): [
+                {'measuredAt': (self.start + timedelta(seconds=1)).isoformat(), 'value': 1.0},
+                {'measuredAt': (self.start + timedelta(seconds=2)).isoformat(), 'value': 2.0},
+            ],
+            str(rejected.id): [{'measuredAt': (self.start + timedelta(seconds=3)).isoformat(), 'value': 3.0}],
+        })
+        self.assertEqual(self.pending_values(accepted), [])
+        self.assertEqual(self.pending_values(rejected), [3.0])
+
+    def test_full_packages_are_followed_by_another_round(self):
+        first, second = self.sensors
+        self.add_measurements(first, [1, 2, 3, 4, 5])
+        self.add_measurements(second, [6])
+
+        def accept_all(request):
+            return 201, {sensor_id: 201 for sensor_id in request.body}
+
+        with StubDashboard(accept_all) as dashboard:
+            self.upload(dashboard, MEASUREMENT_PACKAGE_SIZE=2)
+
+        self.assertEqual([sorted(request.body) for request in dashboard.requests], [
+            sorted([str(first.id), str(second.id)]), [str(first.id)], [str(first.id)],
+        ])
+        self.assertEqual([len(request.body[str(first.id)]) for request in dashboard.requests], [2, 2, 1])
+        self.assertFalse(SensorMeasurement.objects.exists())
+
+    def test_nothing_is_acknowledged_when_the_dashboard_fails(self):
+        self.add_measurements(self.sensors[0], [1, 2])
+
+        with StubDashboard(lambda request: (500, None)) as dashboard:
+            self.upload(dashboard)
+
+        self.assertEqual(len(dashboard.requests), 1)
+        self.assertEqual(self.pending_values(self.sensors[0]), [1.0, 2.0])
+
+    def test_single_sensor_upload(self):
+        sensor = self.sensors[0]
+        self.add_measurements(sensor, [1, 2, 3])
+
+        with StubDashboard() as dashboard:
+            self.upload(dashboard, send=lambda: send_measurements(sensor.id), MEASUREMENT_PACKAGE_SIZE=2)
+
+        self.assertEqual([request.path for request in dashboard.requests], [f'/api/measurements/{sensor.id}'] * 2)
+        self.assertEqual(self.pending_values(sensor), [])
+
+
+class UploadEncodingTest(MeasurementUploadTestCase):
+    def setUp(self):
+        super().setUp()
+        self.sensor = self.sensors[0]
+        self.add_measurements(self.sensor, [1, 2])
+
+    def test_gzip_body(self):
+        with StubDashboard(lambda request: (201, {str(self.sensor.id): 201})) as dashboard:
+            self.upload(dashboard, UPLOAD_CONTENT_ENCODING='gzip')
+
+        request = dashboard.requests[0]
+        self.assertEqual(request.headers['Content-Encoding'], 'gzip')
+        self.assertEqual([row['value'] for row in request.body[str(self.sensor.id)]], [1.0, 2.0])
+        self.assertEqual(self.pending_values(self.sensor), [])
+
+    def test_unsupported_encoding_falls_back_to_identity(self):
+        with StubDashboard(lambda request: (201, {sensor_id: 201 for sensor_id in request.body}),
+                           accepted_encodings=('identity',)) as dashboard:
+            self.upload(dashboard, UPLOAD_CONTENT_ENCODING='gzip')
+            self.add_measurements(self.sensor, [3])
+            self.upload(dashboard, UPLOAD_CONTENT_ENCODING='gzip')
+
+        # only the first upload is tried with gzip, the second one is sent uncompressed right away
+        self.assertEqual(dashboard.unsupported_encoding_requests, 1)
+        self.assertEqual(len(dashboard.requests), 2)
+        for request in dashboard.requests:
+            self.assertNotIn('Content-Encoding', request.headers)
+        self.assertEqual(self.pending_values(self.sensor), [])
+
+    def test_columnar_payload(self):
+        with StubDashboard(lambda request: (201, {str(self.sensor.id): 201})) as dashboard:
+            self.upload(dashboard, MEASUREMENT_PAYLOAD_FORMAT='columnar')
+
+        self.assertEqual(dashboard.requests[0].body, {
+            str(self.sensor.id): {
+                'measuredAt': [round((self.start + timedelta(seconds=value)).timestamp() * 1000) for value in [1, 2]],
+                'value': [1.0, 2.0],
+            },
+        })
+        self.assertEqual(self.pending_values(self.sensor), [])
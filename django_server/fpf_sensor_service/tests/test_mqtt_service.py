@@ -0,0 +1,65 @@
+import json
+import random
+import time
+import uuid
+from unittest import mock
+
+from django.conf import settings
+from django.test import SimpleTestCase
+
+from fpf_sensor_service.services import mqtt_services
+from fpf_sensor_service.services.mqtt_services import MQTTService
+from fpf_sensor_service.tests.utils import fpf_settings
+
+
+def mqtt_sensor() -> mock.Mock:
+    sensor = mock.Mock()
+    sensor.sensor_config.id = uuid.uuid4()
+    return sensor
+
+
+def mqtt_config(**kwargs) -> dict:
+    return {**settings.MQTT_CONFIG, 'STATS_INTERVAL_S': 0, **kwargs}
+
+
+class MQTTServiceTest(SimpleTestCase):
+    databases = {'default'}
+
+    def receive(self, service: MQTTService, sensors: list, value: float):
+        message = mock.Mock(topic='measurements/energy', payload=json.dumps({'value': value}).encode())
+        with mock.patch.object(mqtt_services.topic_index, 'match', return_value=sensors):
+            service.on_message(service.client, None, message)
+
+    def test_readings_of_one_sensor_are_processed_in_order(self):
+        sensors = [mqtt_sensor() for _ in range(4)]
+        processed = {str(sensor.sensor_config.id): [] for sensor in sensors}
+
+        def process_measurement(sensor, topic, payload):
+            time.sleep(random.uniform(0, 0.002))
+            processed[str(sensor.sensor_config.id)].append(payload['value'])
+
+        with fpf_settings(MQTT_CONFIG=mqtt_config(WORKERS=4)), \
+                mock.patch.object(MQTTService, '_run'), \
+                mock.patch.object(MQTTService, 'process_measurement', side_effect=process_measurement):
+            service = MQTTService()
+            service.start()
+            for value in range(50):
+                self.receive(service, [sensors[value % 2], sensors[2 + value % 2]], value)
+            for messages in service.queues:
+                messages.join()
+
+        for values in processed.values():
+            self.assertEqual(len(values), 25)
+            self.assertEqual(values, sorted(values))
+
+    def test_stats_are_logged(self):
+        sensor = mqtt_sensor()
+        with fpf_settings(MQTT_CONFIG=mqtt_config(WORKERS=1, QUEUE_SIZE=2, BACKPRESSURE='drop_oldest')):
+            service = MQTTService()
+            for value in range(3):
+                self.receive(service, [sensor], value)
+            with self.assertLogs('fpf_sensor_service', level='INFO') as logs:
+                service.log_stats()
+
+        self.assertEqual(logs.records[-1].getMessage(),
+                         '[MQTT] 3 messages received and 1 dropped so far, 2 waiting to be processed.')
@@ -0,0 +1,37 @@
+from django.test import SimpleTestCase
+
+from fpf_sensor_service.sensors.reporting_filter import ReportingFilter
+
+
+class ReportingFilterTest(SimpleTestCase):
+    def accepted(self, reporting_filter: ReportingFilter, readings: list[tuple[float, float]]) -> list[float]:
+        """
+        :param readings: (timestamp, value) pairs
+        """
+        return [value for timestamp, value in readings if reporting_filter.accept(value, timestamp)]
+
+    def test_everything_is_stored_without_options(self):
+        self.assertEqual(self.accepted(ReportingFilter(), [(0, 1), (1, 1), (2, 1)]), [1, 1, 1])
+
+    def test_deadband(self):
+        readings = [(0, 10), (1, 10.25), (2, 10.5), (3, 10.75), (4, 9.5)]
+        self.assertEqual(self.accepted(ReportingFilter(deadband=0.5), readings), [10, 10.5, 9.5])
+
+    def test_heartbeat_alone_only_stores_unchanged_readings_once_per_heartbeat(self):
+        readings = [(0, 1), (10, 1), (20, 2), (30, 2), (80, 2), (90, 2)]
+        self.assertEqual(self.accepted(ReportingFilter(heartbeat_seconds=60), readings), [1, 2, 2])
+
+    def test_percent_deadband_of_zero_suppresses_unchanged_readings(self):
+        readings = [(0, 0), (1, 0), (2, 0.001), (3, 0)]
+        self.assertEqual(self.accepted(ReportingFilter(deadband_percent=5), readings), [0, 0.001, 0])
+
+    def test_implausible_jump_is_only_stored_once_confirmed(self):
+        readings = [(0, 20), (1, 80), (2, 21), (3, 80), (4, 80), (5, 80)]
+        self.assertEqual(self.accepted(ReportingFilter(max_rate_of_change=5), readings), [20, 21, 80, 80])
+
+    def test_additional_information(self):
+        reporting_filter = ReportingFilter.from_additional_information(
+            '{"http": "http://sensor", "reporting": {"deadband": 0.5, "heartbeatSeconds": 3600}}'
+        )
+        self.assertEqual((reporting_filter.deadband, reporting_filter.heartbeat_seconds), (0.5, 3600))
+        self.assertFalse(ReportingFilter.from_additional_information('not json').is_active())
@@ -0,0 +1,65 @@
+import collections
+import uuid
+from unittest import mock
+
+from django.test import TestCase
+
+from fpf_sensor_service.services import scheduler_services
+from fpf_sensor_service.services.scheduler_services import scheduler, task, device_task, remove_polling_job, \
+    get_device_group_job_id, device_groups, device_groups_lock, log_retry_summary
+from fpf_sensor_service.tests.utils import fpf_settings
+
+
+def failing_sensor() -> mock.Mock:
+    sensor = mock.Mock()
+    sensor.sensor_config.id = uuid.uuid4()
+    sensor.get_circuit_key.return_value = None
+    sensor.get_measurements.side_effect = ConnectionError('sensor unreachable')
+    return sensor
+
+
+class SchedulerRetryTest(TestCase):
+    def setUp(self):
+        self.addCleanup(scheduler.remove_all_jobs)
+
+    @fpf_settings(GENERATE_MEASUREMENTS=False, MEASUREMENT_RETRY_COUNT=3)
+    def test_removing_the_polling_job_cancels_its_retry(self):
+        sensor = failing_sensor()
+        task(sensor)
+
+        retry_job_id = f"retry_sensor_{sensor.sensor_config.id}"
+        self.assertEqual(scheduler.get_job(retry_job_id).args, (sensor, 2))
+        remove_polling_job(f"sensor_{sensor.sensor_config.id}")
+        self.assertIsNone(scheduler.get_job(retry_job_id))
+
+    @fpf_settings(GENERATE_MEASUREMENTS=False, MEASUREMENT_RETRY_COUNT=3)
+    def test_device_group_retry_polls_the_current_sensors(self):
+        first, second = failing_sensor(), failing_sensor()
+        group_key = ('device', 60)
+        with device_groups_lock:
+            device_groups[group_key] = {str(first.sensor_config.id): first, str(second.sensor_config.id): second}
+        self.addCleanup(device_groups.pop, group_key, None)
+
+        device_task(group_key)
+        scheduler_services.remove_from_device_group(str(first.sensor_config.id))
+
+        retry_job = scheduler.get_job(f"retry_{get_device_group_job_id(group_key)}")
+        retry_job.func(*retry_job.args)
+        first.get_measurements.assert_called_once_with([first, second])
+        second.get_measurements.assert_called_once_with([second])
+
+    @fpf_settings(GENERATE_MEASUREMENTS=False, MEASUREMENT_RETRY_COUNT=3)
+    def test_retry_summary_logs_the_retries_per_sensor(self):
+        flaky, working = failing_sensor(), failing_sensor()
+        working.get_measurements.side_effect = None
+        working.get_measurements.return_value = []
+        with mock.patch.object(scheduler_services, 'retry_counts', collections.Counter()):
+            task(flaky)
+            task(flaky, 2)
+            task(working)
+            with self.assertLogs('fpf_sensor_service', level='INFO') as logs:
+                log_retry_summary()
+
+        self.assertEqual([record.getMessage() for record in logs.records],
+                         ['Sensor measurement retried 2 times since the start'])
+        self.assertEqual(logs.records[0].extra['sensorId'], str(flaky.sensor_config.id))
@@ -0,0 +1,49 @@
+import json
+import uuid
+from datetime import datetime, timezone
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from fpf_sensor_service.models import SensorConfig
+from fpf_sensor_service.sensors.sensecap_seeed_sensor import SenseCapSeeedSensor, sensecap_points_cache
+
+
+def create_sensor(measurement_id: int) -> SenseCapSeeedSensor:
+    return SenseCapSeeedSensor(SensorConfig(
+        id=uuid.uuid4(), intervalSeconds=60, sensorClassId=uuid.uuid4(),
+        additionalInformation=json.dumps({
+            'http': 'https://sensecap.example/points', 'sensor_id': measurement_id,
+            'username': 'user', 'password': 'password',
+        }),
+    ))
+
+
+class SenseCapSeeedSensorTest(SimpleTestCase):
+    def setUp(self):
+        self.addCleanup(sensecap_points_cache.invalidate)
+
+    def get_measurements(self, points: list[dict], measurement_ids: list[int]):
+        sensors = [create_sensor(measurement_id) for measurement_id in measurement_ids]
+        with mock.patch.object(SenseCapSeeedSensor, '_fetch_data', return_value={'data': [{'points': points}]}):
+            return sensors[0].get_measurements(sensors)
+
+    def test_newest_point_is_selected_by_its_time_not_its_string(self):
+        result, = self.get_measurements([
+            {'measurement_id': 4097, 'measurement_value': 1.0, 'time': '2025-01-01T10:30:00.000Z'},
+            {'measurement_id': 4097, 'measurement_value': 2.0, 'time': '2025-01-01T10:45:00+00:00'},
+            # earlier than the second one although its string compares larger
+            {'measurement_id': 4097, 'measurement_value': 3.0, 'time': '2025-01-01T11:40:00+01:00'},
+            {'measurement_id': 4097, 'measurement_value': 4.0},
+        ], [4097])
+
+        self.assertEqual(result.value, 2.0)
+        self.assertEqual(result.timestamp, datetime(2025, 1, 1, 10, 45, tzinfo=timezone.utc))
+
+    def test_missing_measurement_id_only_affects_its_sensor(self):
+        found, missing = self.get_measurements([
+            {'measurement_id': 4097, 'measurement_value': 1.0, 'time': '2025-01-01T10:30:00Z'},
+        ], [4097, 4098])
+
+        self.assertEqual(found.value, 1.0)
+        self.assertIsNone(missing.value)
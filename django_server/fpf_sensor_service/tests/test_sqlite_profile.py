@@ -0,0 +1,44 @@
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.db.utils import ConnectionHandler
+from django.test import SimpleTestCase
+
+from fpf_sensor_service.tests.sqlite_stress import run_sqlite_stress
+
+
+class SqliteProfileTest(SimpleTestCase):
+    """
+    Runs against a database file of its own, the test database is in memory and can't use WAL.
+    """
+    # the connections are opened to the own file, the test database isn't touched
+    databases = {'default'}
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.path = os.path.join(directory, 'db.sqlite3')
+
+    def test_profile_is_applied_to_new_connections(self):
+        connections = ConnectionHandler({'default': {**settings.DATABASES['default'], 'NAME': self.path}})
+        self.addCleanup(connections['default'].close)
+
+        with connections['default'].cursor() as cursor:
+            pragmas = {}
+            for pragma in ['journal_mode', 'synchronous', 'busy_timeout', 'cache_size']:
+                cursor.execute(f'PRAGMA {pragma}')
+                pragmas[pragma] = cursor.fetchone()[0]
+
+        self.assertEqual(pragmas['journal_mode'].upper(), settings.SQLITE_JOURNAL_MODE.upper())
+        self.assertEqual(pragmas['synchronous'], {'OFF': 0, 'NORMAL': 1, 'FULL': 2, 'EXTRA': 3}[settings.SQLITE_SYNCHRONOUS.upper()])
+        self.assertEqual(pragmas['busy_timeout'], settings.SQLITE_BUSY_TIMEOUT_S * 1000)
+        self.assertEqual(pragmas['cache_size'], -settings.SQLITE_CACHE_SIZE_KIB)
+
+    def test_parallel_writers_and_readers_without_lock_errors(self):
+        result = run_sqlite_stress(self.path, writers=4, rows_per_writer=200, readers=2)
+
+        self.assertEqual(result.lock_errors, 0)
+        self.assertEqual(result.written, 4 * 200)
+        self.assertGreater(result.reads, 0)
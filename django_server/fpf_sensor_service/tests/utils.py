@@ -0,0 +1,106 @@
+import gzip
+import json
+import threading
+from contextlib import ExitStack, contextmanager
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable
+from unittest import mock
+
+from django.test import override_settings
+
+import django_server.settings
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+@contextmanager
+def fpf_settings(**kwargs):
+    """
+    Override settings for the services reading django_server.settings directly as well as for those using
+    django.conf.settings.
+    """
+    with ExitStack() as stack:
+        stack.enter_context(override_settings(**kwargs))
+        stack.enter_context(mock.patch.multiple(django_server.settings, **kwargs))
+        yield
+
+
+@dataclass
+class StubRequest:
+    method: str
+    path: str
+    headers: dict
+    body: object
+
+
+class StubDashboard:
+    """
+    Stand-in for the dashboard backend, serving on a free local port from a background thread.
+    Requests are recorded with their decompressed json body and answered by respond(request) -> (status, json).
+    Compressed bodies with an encoding missing from accepted_encodings are answered with 415 and only counted.
+    """
+    def __init__(self, respond: Callable[[StubRequest], tuple[int, object]] = None,
+                 accepted_encodings=('identity', 'gzip', 'zstd')):
+        self.respond = respond or (lambda request: (201, None))
+        self.accepted_encodings = accepted_encodings
+        self.requests: list[StubRequest] = []
+        self.unsupported_encoding_requests = 0
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler())
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address
+        return f'http://{host}:{port}'
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+
+    def _handler(self):
+        dashboard = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                self._handle(None)
+
+            def do_POST(self):
+                self._handle(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+
+            def _handle(self, body):
+                encoding = self.headers.get('Content-Encoding', 'identity')
+                if encoding not in dashboard.accepted_encodings:
+                    dashboard.unsupported_encoding_requests += 1
+                    self._answer(415, None)
+                    return
+
+                if encoding == 'gzip':
+                    body = gzip.decompress(body)
+                elif encoding == 'zstd':
+                    body = zstandard.ZstdDecompressor().decompress(body)
+                request = StubRequest(self.command, self.path, dict(self.headers), json.loads(body) if body else None)
+                dashboard.requests.append(request)
+                self._answer(*dashboard.respond(request))
+
+            def _answer(self, status, data):
+                body = json.dumps(data).encode('utf-8') if data is not None else b''
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
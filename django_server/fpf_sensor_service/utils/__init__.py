@@ -1,3 +1,4 @@
 from .is_uuid import is_uuid
 from .is_named_tuple import is_named_tuple
-from .logging_utils import get_logger
\ No newline at end of file
+from .logging_utils import get_logger
+from .http_utils import http_session_manager
\ No newline at end of file
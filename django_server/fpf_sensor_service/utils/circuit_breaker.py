@@ -0,0 +1,117 @@
+import asyncio
+import threading
+import time
+from enum import Enum
+
+import aiohttp
+import requests
+from django.conf import settings
+
+from fpf_sensor_service.utils.logging_utils import get_logger
+
+
+logger = get_logger()
+
+
+class CircuitState(Enum):
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+
+class CircuitBreaker:
+    """
+    Stops calling a target that keeps failing. After failure_threshold consecutive failures the circuit opens and
+    requests are skipped right away. Once reset_timeout_seconds have passed a single probe request is let through
+    (half open), its success closes the circuit again while a failure keeps it open for another timeout.
+    Opening and closing the circuit is logged with its key.
+    """
+    def __init__(self, failure_threshold: int, reset_timeout_seconds: float, key: str = ''):
+        self.key = key
+        self.failure_threshold = failure_threshold
+        self.reset_timeout_seconds = reset_timeout_seconds
+        self.state = CircuitState.CLOSED
+        self.failures = 0
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow_request(self) -> bool:
+        with self._lock:
+            if self.state == CircuitState.CLOSED:
+                return True
+
+            # let a single probe through, another one only if the last probe didn't report back within the timeout
+            if time.monotonic() - self._opened_at >= self.reset_timeout_seconds:
+                self.state = CircuitState.HALF_OPEN
+                self._opened_at = time.monotonic()
+                return True
+
+            return False
+
+    def record_success(self):
+        with self._lock:
+            was_closed = self.state == CircuitState.CLOSED
+            self.state = CircuitState.CLOSED
+            self.failures = 0
+
+        if not was_closed:
+            logger.info(f"Circuit breaker for {self.key} closed, the target is reachable again")
+
+    def record(self, e: Exception):
+        """
+        Record the outcome of a call that raised e. Only errors telling that the target is unreachable or broken
+        (connection errors, timeouts, 5xx responses) count as failure, bad credentials or unexpected payloads mean
+        the target did answer.
+        """
+        if is_target_failure(e):
+            self.record_failure()
+        else:
+            self.record_success()
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            failures = self.failures
+            opened = self.state == CircuitState.CLOSED and failures >= self.failure_threshold
+            if self.state == CircuitState.HALF_OPEN or failures >= self.failure_threshold:
+                self.state = CircuitState.OPEN
+                self._opened_at = time.monotonic()
+
+        if opened:
+            logger.warning(f"Circuit breaker for {self.key} opened after {failures} failures, "
+                           f"skipping requests for {self.reset_timeout_seconds}s")
+
+
+def is_target_failure(e: Exception) -> bool:
+    if isinstance(e, (requests.ConnectionError, requests.Timeout, aiohttp.ClientConnectionError,
+                      asyncio.TimeoutError, TimeoutError)):
+        return True
+    if isinstance(e, requests.HTTPError) and e.response is not None:
+        return e.response.status_code >= 500
+    if isinstance(e, aiohttp.ClientResponseError):
+        return e.status >= 500
+    return False
+
+
+class CircuitBreakerRegistry:
+    """
+    One circuit breaker per target, e.g. per sensor host or for the dashboard backend.
+    """
+    def __init__(self):
+        self._breakers: dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> CircuitBreaker:
+        with self._lock:
+            breaker = self._breakers.get(key)
+            if breaker is None:
+                breaker = CircuitBreaker(
+                    failure_threshold=settings.CIRCUIT_BREAKER_FAILURE_THRESHOLD,
+                    reset_timeout_seconds=settings.CIRCUIT_BREAKER_RESET_TIMEOUT_S,
+                    key=key,
+                )
+                self._breakers[key] = breaker
+            return breaker
+
+
+circuit_breakers = CircuitBreakerRegistry()
@@ -0,0 +1,61 @@
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Hashable
+
+
+class SharedFetchCache:
+    """
+    Shares the result of an expensive fetch (e.g. one http request several sensors read from) between callers.
+    Every caller decides by its own ttl whether the last result is recent enough, so callers polling more often than
+    the one that fetched don't get its result for longer than they asked for. Concurrent callers for the same key wait
+    for the single fetch in flight instead of starting their own. Failed fetches are not cached, the error is raised
+    to every waiting caller.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        # (fetched at, result) per key
+        self._entries: dict[Hashable, tuple[float, Any]] = {}
+        # largest ttl any caller asked for per key, results older than that are of no use anymore
+        self._max_ttls: dict[Hashable, float] = {}
+        self._in_flight: dict[Hashable, Future] = {}
+
+    def get(self, key: Hashable, ttl_seconds: float, fetch: Callable[[], Any]) -> Any:
+        with self._lock:
+            self._max_ttls[key] = max(ttl_seconds, self._max_ttls.get(key, 0))
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[0] < ttl_seconds:
+                return entry[1]
+
+            future = self._in_flight.get(key)
+            is_owner = future is None
+            if is_owner:
+                future = Future()
+                self._in_flight[key] = future
+
+        if not is_owner:
+            return future.result()
+
+        try:
+            value = fetch()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(value)
+            return value
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+                if future.exception() is None:
+                    now = time.monotonic()
+                    self._entries = {k: v for k, v in self._entries.items() if now - v[0] < self._max_ttls[k]}
+                    self._entries[key] = (now, future.result())
+
+    def invalidate(self, key: Hashable = None):
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+                self._max_ttls.clear()
+            else:
+                self._entries.pop(key, None)
@@ -0,0 +1,99 @@
+import gzip
+import json
+import threading
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+class JsonBodyEncoder:
+    """
+    Serializes json request bodies compactly and compresses them with the configured content encoding:
+    'identity', 'gzip', 'zstd' (needs the optional zstandard package, otherwise gzip is used) or 'auto' for the
+    best one available. A server answering 415 Unsupported Media Type to a compressed body gets the request
+    repeated uncompressed and all following bodies are sent uncompressed as well.
+    """
+    def __init__(self, content_encoding: str = 'identity'):
+        if content_encoding == 'auto':
+            content_encoding = 'zstd' if zstandard is not None else 'gzip'
+        elif content_encoding == 'zstd' and zstandard is None:
+            content_encoding = 'gzip'
+        self.content_encoding = content_encoding
+
+    def encode(self, data) -> tuple[bytes, dict]:
+        body = json.dumps(data, separators=(',', ':')).encode('utf-8')
+        headers = {'Content-Type': 'application/json'}
+        if self.content_encoding == 'gzip':
+            body = gzip.compress(body, compresslevel=6)
+            headers['Content-Encoding'] = 'gzip'
+        elif self.content_encoding == 'zstd':
+            body = zstandard.ZstdCompressor().compress(body)
+            headers['Content-Encoding'] = 'zstd'
+        return body, headers
+
+    def post(self, session: requests.Session, url: str, data, headers: dict = None, **kwargs) -> requests.Response:
+        content_encoding = self.content_encoding
+        body, encoding_headers = self.encode(data)
+        response = session.post(url, data=body, headers={**(headers or {}), **encoding_headers}, **kwargs)
+
+        if response.status_code == 415 and content_encoding != 'identity':
+            self.content_encoding = 'identity'
+            body, encoding_headers = self.encode(data)
+            response = session.post(url, data=body, headers={**(headers or {}), **encoding_headers}, **kwargs)
+        return response
+
+
+class HttpSessionManager:
+    """
+    Provides one requests session for the whole process. Its adapters keep a pool of keep-alive connections
+    per host, so polling the same endpoints every few seconds reuses connections instead of doing a new
+    TCP (and TLS) handshake per request.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._session = None
+        self._json_body_encoder = None
+
+    @property
+    def session(self) -> requests.Session:
+        if self._session is None:
+            with self._lock:
+                if self._session is None:
+                    self._session = self._create_session()
+        return self._session
+
+    @property
+    def dashboard_timeout(self) -> tuple[int, int]:
+        """
+        (connect, read) timeout for requests to the dashboard backend.
+        """
+        return settings.DASHBOARD_CONNECT_TIMEOUT_S, settings.DASHBOARD_READ_TIMEOUT_S
+
+    def post_json(self, url: str, data, **kwargs) -> requests.Response:
+        """
+        POST data as (compressed, see UPLOAD_CONTENT_ENCODING) json body.
+        """
+        if self._json_body_encoder is None:
+            self._json_body_encoder = JsonBodyEncoder(settings.UPLOAD_CONTENT_ENCODING)
+        return self._json_body_encoder.post(self.session, url, data, **kwargs)
+
+    @staticmethod
+    def _create_session() -> requests.Session:
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=settings.HTTP_POOL_CONNECTIONS,
+            pool_maxsize=settings.HTTP_POOL_MAXSIZE,
+            pool_block=False,
+        )
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+
+
+http_session_manager = HttpSessionManager()
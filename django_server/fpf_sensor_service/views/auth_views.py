@@ -3,6 +3,7 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from fpf_sensor_service.models import Configuration, ConfigurationKeys
+from fpf_sensor_service.services.configuration_services import configuration_cache
 
 
 @api_view(['POST'])
@@ -12,6 +13,7 @@ def post_fpf_id(request):
         key=ConfigurationKeys.FPF_ID.value,
         value=request.data[ConfigurationKeys.FPF_ID.value],
     )
+    configuration_cache.invalidate(ConfigurationKeys.FPF_ID)
     return Response(status=status.HTTP_200_OK)
 
 
@@ -28,4 +30,5 @@ def post_api_key(request):
         configuration.value = request.data[ConfigurationKeys.API_KEY.value]
         configuration.save()
 
+    configuration_cache.invalidate(ConfigurationKeys.API_KEY)
     return Response(status=status.HTTP_200_OK)
\ No newline at end of file
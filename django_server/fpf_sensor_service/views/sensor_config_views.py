@@ -1,3 +1,8 @@
+import functools
+import hashlib
+import json
+
+from django_server import settings
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
@@ -31,9 +36,31 @@ class SensorView(APIView):
         return Response(serializer.data)
 
 
+@functools.cache
+def get_sensor_types_catalogue() -> tuple[list, str]:
+    """
+    The available sensor types only change with a deployment, so they are serialized once per process.
+    :return: the serialized sensor descriptions and their (strong) ETag
+    """
+    sensor_types = typed_sensor_factory.get_available_sensor_types()
+    data = SensorDescriptionSerializer(sensor_types, many=True).data
+    etag = hashlib.sha256(json.dumps(data, sort_keys=True).encode('utf-8')).hexdigest()
+    return data, f'"{etag}"'
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def get_available_sensor_types(request):
-    sensor_types = typed_sensor_factory.get_available_sensor_types()
-    serializer = SensorDescriptionSerializer(sensor_types, many=True)
-    return Response(serializer.data)
+    data, etag = get_sensor_types_catalogue()
+    headers = {
+        'ETag': etag,
+        'Cache-Control': f'private, max-age={settings.SENSOR_TYPES_MAX_AGE_S}, must-revalidate',
+    }
+
+    # If-None-Match uses the weak comparison, so a W/ prefix added by a proxy still matches
+    if_none_match = request.headers.get('If-None-Match', '')
+    client_etags = {tag.strip().removeprefix('W/') for tag in if_none_match.split(',')}
+    if '*' in client_etags or etag in client_etags:
+        return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    return Response(data, headers=headers)